@@ -1,3 +1,4 @@
+from decimal import InvalidOperation
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
@@ -6,9 +7,19 @@ from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from flask_wtf.csrf import CSRFProtect
 from config import config
+from app.cache import cache
+from app.passwords import password_hasher
+from app.aio import async_reads
+from app.pdf import pdf_store
+from app.money import format_brl
+from app.timing import request_timing
+from app.metrics import metrics
+from app.replica import replica_router, RoutingSession
+from app.pooling import pool_policy
+from app.jobs import job_queue
 
 # Instanciamos as extensões GLOBALMENTE
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 migrate = Migrate()
 login_manager = LoginManager()
 csrf = CSRFProtect()
@@ -27,28 +38,37 @@ def create_app(config_name='default'):
     app.config.from_object(config[config_name])
     config[config_name].init_app(app)
 
-    # Inicializa extensões
+    # Inicializa extensões (timing e réplica antes do db: mexem no pool e nos binds)
+    request_timing.init_app(app)
+    replica_router.init_app(app)
     db.init_app(app)
+    pool_policy.init_app(app, db)
     migrate.init_app(app, db)
     login_manager.init_app(app)
     limiter.init_app(app)
     csrf.init_app(app)
+    cache.init_app(app)
+    password_hasher.init_app(app)
+    async_reads.init_app(app, db)
+    pdf_store.init_app(app)
+    job_queue.init_app(app)
+    metrics.init_app(app, db)
 
     # Configuração do Flask-Login
-    from app.models import User
+    from app.identity import load_identity
 
     @login_manager.user_loader
     def load_user(user_id):
-        return db.session.get(User, int(user_id))
+        # User + UserConfig num único JOIN (e, se habilitado, direto do identity cache)
+        return load_identity(int(user_id))
 
     # Filtro de Moeda
     @app.template_filter('format_currency')
     def format_currency(value):
-        if value is None: 
-            value = 0
+        # Direto do Decimal/Money (sem float): '1.234,56'
         try:
-            return f"{float(value):,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-        except:
+            return format_brl(value)
+        except (InvalidOperation, TypeError, ValueError):
             return "0,00"
 
     # Registro de Blueprints
@@ -56,10 +76,22 @@ def create_app(config_name='default'):
     from app.routes.dashboard import dashboard_bp
     from app.routes.budget import budget_bp
     from app.routes.operations import operations_bp
+    from app.routes.api import api_bp
+    from app.routes.reads import reads_bp
+    from app.routes.jobs import jobs_bp
 
     app.register_blueprint(dashboard_bp) 
     app.register_blueprint(auth_bp, url_prefix='/auth')
     app.register_blueprint(budget_bp, url_prefix='/budget')
     app.register_blueprint(operations_bp, url_prefix='/operations')
+    app.register_blueprint(api_bp, url_prefix='/api')
+    app.register_blueprint(reads_bp, url_prefix='/async')
+    app.register_blueprint(jobs_bp, url_prefix='/api/jobs')
+
+    # Manutenção do rollup mensal, do cache do dashboard, da versão do catálogo
+    # e da versão dos orçamentos (eventos do SQLAlchemy), tarefas da fila e comandos CLI
+    from app import rollup, stats, catalog, fragments, tasks  # noqa: F401
+    from app.commands import register_commands
+    register_commands(app)
 
     return app
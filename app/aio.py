@@ -0,0 +1,101 @@
+import asyncio
+import os
+import threading
+
+from flask import current_app
+from sqlalchemy.engine import make_url
+
+
+def to_async_url(uri):
+    """postgresql:// -> postgresql+asyncpg:// (sslmode vira ssl); sqlite:// -> sqlite+aiosqlite://."""
+    url = make_url(uri)
+    if url.drivername.startswith('postgresql'):
+        query = dict(url.query)
+        if 'sslmode' in query:
+            query['ssl'] = query.pop('sslmode')
+        return url.set(drivername='postgresql+asyncpg', query=query)
+    if url.drivername.startswith('sqlite'):
+        return url.set(drivername='sqlite+aiosqlite')
+    return url
+
+
+class AsyncReads:
+    """
+    Engine assíncrona para as leituras independentes de uma página (totais, gráfico,
+    página de orçamentos, itens...). As queries rodam em paralelo, cada uma na sua conexão,
+    então a latência fica perto da query mais lenta e não da soma delas.
+
+    O event loop vive numa thread própria por processo: as views continuam síncronas
+    (workers sync do Gunicorn) e o pool do asyncpg fica preso a um único loop.
+    Sem ASYNC_READS (ou sem o driver instalado) as mesmas queries rodam em sequência no db.session.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.url = None
+        self.engine_options = {}
+        self.timeout = 30
+        self._loop = None
+        self._engine = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app, db=None):
+        self.enabled = app.config.get('ASYNC_READS', False)
+        uri = app.config.get('ASYNC_DATABASE_URI')
+        if not uri and db is not None:
+            # URL já resolvida pelo Flask-SQLAlchemy (SQLite relativo vai para o instance_path);
+            # só o driver muda, então as duas engines abrem o mesmo banco
+            with app.app_context():
+                uri = db.engine.url
+        uri = uri or app.config.get('SQLALCHEMY_DATABASE_URI')
+        self.url = to_async_url(uri) if uri else None
+        self.engine_options = app.config.get('ASYNC_ENGINE_OPTIONS', {})
+        self.timeout = app.config.get('ASYNC_READS_TIMEOUT', 30)
+        app.extensions['async_reads'] = self
+
+    def _start(self):
+        # Criado no primeiro uso dentro de cada worker (depois do fork)
+        with self._lock:
+            if self._loop is not None and self._pid == os.getpid():
+                return
+            from sqlalchemy.ext.asyncio import create_async_engine
+
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name='async-reads', daemon=True).start()
+            self._engine = create_async_engine(self.url, **self.engine_options)
+            # Mesma política do pool síncrono: teste só após ociosidade, contadores no /metrics
+            from app.pooling import pool_policy
+            pool_policy.watch(self._engine.sync_engine.pool)
+            self._loop = loop
+            self._pid = os.getpid()
+
+    async def _fetch(self, stmt):
+        async with self._engine.connect() as conn:
+            result = await conn.execute(stmt)
+            return result.all()
+
+    async def _gather(self, stmts):
+        return await asyncio.gather(*(self._fetch(stmt) for stmt in stmts))
+
+    def _fetch_sequential(self, stmts):
+        from app import db
+        return [db.session.execute(stmt).all() for stmt in stmts]
+
+    def fetch_all(self, *stmts):
+        """Executa os selects em paralelo e devolve uma lista de listas de Row, na mesma ordem."""
+        if not self.enabled:
+            return self._fetch_sequential(stmts)
+
+        try:
+            self._start()
+        except ImportError as e:
+            current_app.logger.warning(f'Driver assíncrono indisponível ({e}); leituras em sequência.')
+            self.enabled = False
+            return self._fetch_sequential(stmts)
+
+        future = asyncio.run_coroutine_threadsafe(self._gather(stmts), self._loop)
+        return future.result(timeout=self.timeout)
+
+
+async_reads = AsyncReads()
@@ -0,0 +1,190 @@
+"""
+Série de faturamento por período arbitrário (dia/semana/mês/trimestre/ano).
+
+Uma única query agrupada por balde: date_trunc no Postgres, strftime/date() no SQLite,
+sempre sobre 'date >= início AND date < fim' para usar o índice (user_id, date) — nada de
+extract() no WHERE. Aprovado/Pendente/Perdido e a taxa de conversão saem da mesma leitura.
+
+Período fechado (terminou antes de hoje) vai para o cache. Orçamento retroativo muda
+período fechado, então a chave leva uma geração por usuário, trocada no commit que mexe
+nos orçamentos dele (mesmo listener que invalida o dashboard, app/stats.py).
+"""
+import uuid
+from datetime import date, datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import case, func, literal, select
+
+from app import db
+from app.cache import cache
+from app.models import Budget
+from app.money import Money, ZERO
+from app.rollup import STATUSES
+
+GRANULARITIES = ('day', 'week', 'month', 'quarter', 'year')
+
+
+def floor_bucket(day, granularity):
+    """Início do balde que contém o dia (semana começa na segunda, como o date_trunc)."""
+    if granularity == 'day':
+        return day
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    if granularity == 'quarter':
+        return date(day.year, (day.month - 1) // 3 * 3 + 1, 1)
+    return date(day.year, 1, 1)
+
+
+def next_bucket(start, granularity):
+    if granularity == 'day':
+        return start + timedelta(days=1)
+    if granularity == 'week':
+        return start + timedelta(days=7)
+    months = {'month': 1, 'quarter': 3, 'year': 12}[granularity]
+    month = start.month - 1 + months
+    return date(start.year + month // 12, month % 12 + 1, 1)
+
+
+def bucket_starts(start, end, granularity):
+    """Baldes que cobrem [start, end] (dias inclusivos), inclusive os vazios."""
+    current = floor_bucket(start, granularity)
+    buckets = []
+    while current <= end:
+        buckets.append(current)
+        current = next_bucket(current, granularity)
+    return buckets
+
+
+def bucket_count(start, end, granularity):
+    """len(bucket_starts(...)) sem montar a lista: dá para recusar intervalos enormes antes."""
+    if end < start:
+        return 0
+    if granularity == 'day':
+        return (end - start).days + 1
+    if granularity == 'week':
+        return (floor_bucket(end, 'week') - floor_bucket(start, 'week')).days // 7 + 1
+    if granularity == 'month':
+        return (end.year - start.year) * 12 + end.month - start.month + 1
+    if granularity == 'quarter':
+        return (end.year - start.year) * 4 + (end.month - 1) // 3 - (start.month - 1) // 3 + 1
+    return end.year - start.year + 1
+
+
+def bucket_expression(dialect, granularity):
+    if dialect == 'postgresql':
+        return func.date_trunc(granularity, Budget.date)
+
+    # SQLite: texto 'AAAA-MM-DD' do início do balde
+    if granularity == 'day':
+        return func.date(Budget.date)
+    if granularity == 'week':
+        # 'weekday 0' avança até o domingo (ou fica nele); 6 dias antes é a segunda
+        return func.date(Budget.date, 'weekday 0', '-6 days')
+    if granularity == 'month':
+        return func.strftime('%Y-%m-01', Budget.date)
+    if granularity == 'quarter':
+        month = (func.cast(func.strftime('%m', Budget.date), db.Integer) - 1) // 3 * 3 + 1
+        return func.printf('%s-%02d-01', func.strftime('%Y', Budget.date), month)
+    return func.strftime('%Y-01-01', Budget.date)
+
+
+def _as_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def analytics_statement(dialect, user_id, start, end, granularity):
+    bucket = bucket_expression(dialect, granularity).label('bucket')
+    status = func.coalesce(Budget.status, 'Pendente')
+
+    columns = [bucket]
+    for name in STATUSES:
+        columns.append(func.coalesce(func.sum(case((status == name, Budget.final_price), else_=literal(0))), 0))
+        columns.append(func.sum(case((status == name, 1), else_=0)))
+
+    return select(*columns).where(
+        Budget.user_id == user_id,
+        Budget.date >= datetime.combine(start, datetime.min.time()),
+        Budget.date < datetime.combine(end + timedelta(days=1), datetime.min.time()),
+    ).group_by(bucket).order_by(bucket)
+
+
+def win_rate(approved, lost):
+    """Aprovados sobre decididos (aprovados + perdidos), por quantidade; None sem decisão."""
+    decided = approved + lost
+    return round(approved / decided, 4) if decided else None
+
+
+def compute_revenue_series(user_id, start, end, granularity):
+    """Dicionário pronto para JSON: rótulos, valores e quantidades por status e taxa de conversão."""
+    buckets = bucket_starts(start, end, granularity)
+    index = {bucket: i for i, bucket in enumerate(buckets)}
+    values = {name: [ZERO] * len(buckets) for name in STATUSES}
+    counts = {name: [0] * len(buckets) for name in STATUSES}
+
+    dialect = db.session.get_bind().dialect.name
+    for row in db.session.execute(analytics_statement(dialect, user_id, start, end, granularity)):
+        i = index.get(_as_date(row[0]))
+        if i is None:
+            continue
+        for n, name in enumerate(STATUSES):
+            values[name][i] += Money(row[1 + 2 * n])
+            counts[name][i] += int(row[2 + 2 * n] or 0)
+
+    total_counts = {name: sum(counts[name]) for name in STATUSES}
+    return {
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'granularity': granularity,
+        'labels': [bucket.isoformat() for bucket in buckets],
+        'series': {name: [str(v) for v in values[name]] for name in STATUSES},
+        'counts': counts,
+        'win_rate': [win_rate(counts['Aprovado'][i], counts['Perdido'][i]) for i in range(len(buckets))],
+        'totals': {
+            'values': {name: str(sum(values[name], ZERO)) for name in STATUSES},
+            'counts': total_counts,
+            'win_rate': win_rate(total_counts['Aprovado'], total_counts['Perdido']),
+        },
+    }
+
+
+class RevenueAnalytics:
+    """Cache das séries de períodos fechados, com geração por usuário para invalidar."""
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    @staticmethod
+    def generation_key(user_id):
+        return f'analytics:gen:{user_id}'
+
+    @staticmethod
+    def key(user_id, generation, start, end, granularity):
+        return f'analytics:v1:{user_id}:{generation}:{start.isoformat()}:{end.isoformat()}:{granularity}'
+
+    def get(self, user_id, start, end, granularity, today=None):
+        today = today or datetime.now().date()
+        if end >= today:
+            # Período aberto: hoje ainda pode ganhar orçamento
+            return compute_revenue_series(user_id, start, end, granularity)
+
+        generation = self.cache.get(self.generation_key(user_id)) or '0'
+        key = self.key(user_id, generation, start, end, granularity)
+        payload = self.cache.get(key)
+        if payload is None:
+            payload = compute_revenue_series(user_id, start, end, granularity)
+            self.cache.set(key, payload, ttl=current_app.config.get('ANALYTICS_CACHE_TTL', 86400))
+        return payload
+
+    def invalidate(self, user_id):
+        # As chaves antigas deixam de ser lidas e expiram pelo TTL
+        self.cache.set(self.generation_key(user_id), uuid.uuid4().hex,
+                       ttl=current_app.config.get('ANALYTICS_CACHE_TTL', 86400) * 2)
+
+
+revenue_analytics = RevenueAnalytics(cache)
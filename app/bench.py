@@ -0,0 +1,263 @@
+"""
+Micro-benchmarks dos caminhos quentes (conversões, precificação, parsing de itens,
+formatação de moeda e renderização de templates). Rodam via 'flask bench'.
+
+Cada caso mede o tempo por chamada (mediana de várias rodadas, cada rodada com
+o número de repetições calibrado pelo timeit). O resultado é salvo em JSON e pode
+ser comparado com um baseline: casos acima da tolerância contam como regressão.
+"""
+import json
+import platform
+import random
+import statistics
+import subprocess
+import timeit
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from flask import current_app, render_template
+
+CASES = {}
+
+
+def bench(name):
+    """Registra um caso. A função recebe o app e devolve o callable a ser medido."""
+    def decorator(setup):
+        CASES[name] = setup
+        return setup
+    return decorator
+
+
+# --- Dados sintéticos -------------------------------------------------------------
+
+def _rng():
+    # Semente fixa: todas as rodadas medem exatamente os mesmos dados
+    return random.Random(42)
+
+
+def _raw_numbers(n):
+    rng = _rng()
+    samples = ['', None, 'abc', '0', '1', '12,50', '99.9', '1500', '-3', '0,005']
+    return [rng.choice(samples) if rng.random() < 0.3 else f'{rng.uniform(0, 50000):.2f}' for _ in range(n)]
+
+
+def _items(n):
+    rng = _rng()
+    return [{
+        'id': i + 1 if i % 2 else None,
+        'name': f'Item {i}',
+        'type': rng.choice(['gear', 'freela']),
+        'value': f'{rng.uniform(10, 5000):.2f}',
+        'days': rng.choice(['1', '2', '0.5', '3']),
+    } for i in range(n)]
+
+
+def _config():
+    from app.models import UserConfig
+    return UserConfig(id=1, user_id=1, monthly_goal=Decimal('30000.00'), hourly_rate=Decimal('125.00'),
+                      company_name='Produtora Exemplo', cnpj='00.000.000/0001-00', address='Rua A, 1',
+                      whatsapp='11 99999-0000', brand_color='#00ffa3', catalog_version=1)
+
+
+def _budgets(n, items_per_budget=0):
+    from app.models import Budget, BudgetItem
+    rng = _rng()
+    start = datetime(2026, 1, 31, 12, 0)
+    budgets = []
+    for i in range(n):
+        budget = Budget(
+            id=i + 1, user_id=1, client=f'Cliente {i}', client_cnpj='', client_phone='', client_address='',
+            title=f'Projeto {i}', description='Diária de filmagem', date=start - timedelta(hours=i),
+            status=rng.choice(['Pendente', 'Aprovado', 'Perdido']), labor_days=Decimal('2.00'),
+            margin_percent=30, tax_percent=Decimal('6.00'), extra_cost=Decimal('150.00'),
+            total_cost=Decimal('1850.00'), final_price=Decimal(f'{rng.uniform(500, 90000):.2f}'), version=1,
+        )
+        budget.items = [BudgetItem(id=i * 1000 + j, name=f'Item {j}', item_type='gear',
+                                   value=Decimal('100.00'), days=Decimal('2.00'))
+                        for j in range(items_per_budget)]
+        budgets.append(budget)
+    return budgets
+
+
+# --- Casos --------------------------------------------------------------------------
+
+@bench('utils.safe_decimal[10k]')
+def _safe_decimal(app):
+    from app.utils import safe_decimal
+    values = _raw_numbers(10_000)
+    return lambda: [safe_decimal(v) for v in values]
+
+
+@bench('utils.safe_int[10k]')
+def _safe_int(app):
+    from app.utils import safe_int
+    values = _raw_numbers(10_000)
+    return lambda: [safe_int(v) for v in values]
+
+
+@bench('pricing.price_budget[100 itens]')
+def _price_budget(app):
+    from app.pricing import price_budget, items_cost
+    from app.routes.budget import parse_items_json
+    items = parse_items_json(json.dumps(_items(100)))
+    return lambda: price_budget(items_cost(items), Decimal('2.00'), Decimal('125.00'),
+                                Decimal('150.00'), 30, Decimal('6.00'))
+
+
+@bench('pricing.price_batch[1000 linhas]')
+def _price_batch(app):
+    from app.pricing import price_batch
+    rng = _rng()
+    rows = [{'id': i, 'items_total': Decimal(f'{rng.uniform(0, 20000):.2f}'), 'labor_days': Decimal('1.50'),
+             'extra_cost': Decimal('0.00'), 'margin_percent': 30, 'tax_percent': Decimal('6.00')}
+            for i in range(1000)]
+    return lambda: price_batch(rows, Decimal('125.00'))
+
+
+def _parse_items(n):
+    def setup(app):
+        from app.routes.budget import parse_items_json
+        raw = json.dumps(_items(n))
+        return lambda: parse_items_json(raw)
+    return setup
+
+
+for _n in (10, 100, 1000):
+    bench(f'budget.parse_items_json[{_n} itens]')(_parse_items(_n))
+
+
+@bench('filters.format_currency[10k]')
+def _format_currency(app):
+    fmt = app.jinja_env.filters['format_currency']
+    rng = _rng()
+    values = [Decimal(f'{rng.uniform(-1000, 10_000_000):.2f}') for _ in range(10_000)]
+    return lambda: [fmt(v) for v in values]
+
+
+def _in_request(app, render):
+    # Renderiza dentro de um request falso (url_for, csrf_token e session funcionando)
+    def run():
+        with app.test_request_context('/'):
+            return render()
+    return run
+
+
+@bench('render.dashboard.html[10 linhas]')
+def _render_dashboard(app):
+    from app.pagination import KeysetPage
+    from app.models import Budget
+    from app.routes.dashboard import render_dashboard
+    from app.rollup import STATUSES
+    config = _config()
+    page = KeysetPage(_budgets(10), True, True, Budget.date, Budget.id)
+    totals = {status: Decimal('12345.67') for status in STATUSES}
+    revenue = [Decimal('1000.00')] * 12
+    return _in_request(app, lambda: render_dashboard(config, 1, totals, revenue, 42, page))
+
+
+@bench('render.print_budget.html[30 itens]')
+def _render_print(app):
+    config = _config()
+    budget = _budgets(1, items_per_budget=30)[0]
+    return _in_request(app, lambda: render_template('print_budget.html', budget=budget, config=config))
+
+
+@bench('render.budget_form.html[20 itens, 150 no catálogo]')
+def _render_form(app):
+    config = _config()
+    budget = _budgets(1, items_per_budget=20)[0]
+    items_data = [item.to_dict() for item in budget.items]
+    catalog = {
+        'gears': [{'id': i, 'name': f'Câmera {i}', 'rental_value': '150.00', 'purchase_value': '9000.00'} for i in range(100)],
+        'freelas': [{'id': i, 'name': f'Freela {i}', 'role': 'Som', 'daily_rate': '600.00'} for i in range(50)],
+    }
+    return _in_request(app, lambda: render_template('budget_form.html', config=config, budget=budget,
+                                                     items_data=items_data, **catalog))
+
+
+# --- Execução e comparação --------------------------------------------------------------
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              timeout=5, cwd=current_app.root_path).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def measure(func, repeat=5, min_time=0.2):
+    """Tempos por chamada (ns) de `repeat` rodadas; cada rodada dura pelo menos ~min_time s."""
+    timer = timeit.Timer(func)
+    number, elapsed = timer.autorange()
+    if elapsed < min_time:
+        number = max(1, int(number * min_time / max(elapsed, 1e-9)))
+    return [t / number * 1e9 for t in timer.repeat(repeat=repeat, number=number)], number
+
+
+def run_benchmarks(app, only=None, repeat=5, min_time=0.2, echo=None):
+    results = {}
+    for name, setup in CASES.items():
+        if only and only not in name:
+            continue
+        func = setup(app)
+        func()  # aquecimento (caches de template, imports preguiçosos)
+        times, number = measure(func, repeat=repeat, min_time=min_time)
+        results[name] = {
+            'median_ns': statistics.median(times),
+            'min_ns': min(times),
+            'stdev_ns': statistics.stdev(times) if len(times) > 1 else 0.0,
+            'loops': number,
+            'repeat': repeat,
+        }
+        if echo:
+            echo(f'{name:<55} {_human(results[name]["median_ns"]):>12}')
+
+    return {
+        'meta': {
+            'created_at': datetime.utcnow().isoformat(timespec='seconds') + 'Z',
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'machine': platform.machine(),
+            'commit': _git_commit(),
+        },
+        'results': results,
+    }
+
+
+def compare(current, baseline, tolerance=0.10):
+    """
+    Compara medianas com o baseline. Retorna [(nome, baseline_ns, atual_ns, razão, status)],
+    status em 'regressão', 'melhora', 'ok' ou 'novo'.
+    """
+    rows = []
+    base_results = baseline.get('results', {})
+    for name, result in current['results'].items():
+        base = base_results.get(name)
+        if base is None:
+            rows.append((name, None, result['median_ns'], None, 'novo'))
+            continue
+        ratio = result['median_ns'] / base['median_ns']
+        if ratio > 1 + tolerance:
+            status = 'regressão'
+        elif ratio < 1 - tolerance:
+            status = 'melhora'
+        else:
+            status = 'ok'
+        rows.append((name, base['median_ns'], result['median_ns'], ratio, status))
+    return rows
+
+
+def _human(ns):
+    for unit, scale in (('s', 1e9), ('ms', 1e6), ('µs', 1e3)):
+        if ns >= scale:
+            return f'{ns / scale:.2f} {unit}'
+    return f'{ns:.0f} ns'
+
+
+def format_comparison(rows):
+    lines = []
+    for name, base, current, ratio, status in rows:
+        base_txt = _human(base) if base is not None else '-'
+        ratio_txt = f'{ratio:.2f}x' if ratio is not None else '-'
+        lines.append(f'{name:<55} {base_txt:>12} {_human(current):>12} {ratio_txt:>7}  {status}')
+    return '\n'.join(lines)
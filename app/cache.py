@@ -0,0 +1,139 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+
+
+class LocalCache:
+    """LRU em memória do processo, com TTL. Usado em dev/testes ou sem Redis."""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def get_many(self, keys):
+        return [self.get(key) for key in keys]
+
+    def set_many(self, mapping, ttl=None):
+        for key, value in mapping.items():
+            self.set(key, value, ttl)
+
+
+class RedisCache:
+    """Cache compartilhado entre workers do Gunicorn. Valores serializados em JSON."""
+
+    def __init__(self, url, prefix='cineorca:'):
+        import redis
+        self._errors = redis.RedisError
+        self.client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self.prefix = prefix
+
+    def get(self, key):
+        try:
+            raw = self.client.get(self.prefix + key)
+        except self._errors as e:
+            # Redis fora do ar vira cache miss, nunca erro 500
+            current_app.logger.warning(f'Cache indisponível (get): {e}')
+            return None
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key, value, ttl=None):
+        try:
+            self.client.set(self.prefix + key, json.dumps(value), ex=ttl)
+        except self._errors as e:
+            current_app.logger.warning(f'Cache indisponível (set): {e}')
+
+    def delete(self, *keys):
+        if not keys:
+            return
+        try:
+            self.client.delete(*[self.prefix + key for key in keys])
+        except self._errors as e:
+            current_app.logger.warning(f'Cache indisponível (delete): {e}')
+
+    def get_many(self, keys):
+        # Um MGET só, em vez de uma ida ao Redis por chave
+        if not keys:
+            return []
+        try:
+            raws = self.client.mget([self.prefix + key for key in keys])
+        except self._errors as e:
+            current_app.logger.warning(f'Cache indisponível (get_many): {e}')
+            return [None] * len(keys)
+        return [json.loads(raw) if raw is not None else None for raw in raws]
+
+    def set_many(self, mapping, ttl=None):
+        if not mapping:
+            return
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for key, value in mapping.items():
+                pipe.set(self.prefix + key, json.dumps(value), ex=ttl)
+            pipe.execute()
+        except self._errors as e:
+            current_app.logger.warning(f'Cache indisponível (set_many): {e}')
+
+
+class Cache:
+    """Fachada no estilo extensão Flask: Redis se REDIS_URL existir, senão LRU local."""
+
+    def __init__(self):
+        self.backend = LocalCache()
+
+    def init_app(self, app):
+        redis_url = app.config.get('REDIS_URL')
+        if redis_url:
+            try:
+                self.backend = RedisCache(redis_url)
+            except ImportError:
+                app.logger.warning('Pacote redis não instalado; usando cache local.')
+                self.backend = LocalCache(app.config.get('CACHE_LOCAL_MAX_ENTRIES', 1024))
+        else:
+            self.backend = LocalCache(app.config.get('CACHE_LOCAL_MAX_ENTRIES', 1024))
+        app.extensions['cache'] = self
+
+    def get(self, key):
+        return self.backend.get(key)
+
+    def set(self, key, value, ttl=None):
+        self.backend.set(key, value, ttl)
+
+    def delete(self, *keys):
+        self.backend.delete(*keys)
+
+    def get_many(self, keys):
+        return self.backend.get_many(keys)
+
+    def set_many(self, mapping, ttl=None):
+        self.backend.set_many(mapping, ttl)
+
+
+cache = Cache()
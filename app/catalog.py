@@ -0,0 +1,88 @@
+from decimal import Decimal
+
+from flask import current_app
+from sqlalchemy import event, update, select
+from sqlalchemy.orm import Session
+
+from app import db
+from app.cache import cache
+from app.aio import async_reads
+from app.identity import mark_identity_touched
+from app.models import UserConfig, Equipment, Freelancer
+
+# Clientes ficam de fora: o formulário busca por autocomplete (/operations/api/clients/suggest)
+CATALOG_MODELS = (Equipment, Freelancer)
+
+
+def bump_catalog_version(session, user_ids):
+    """Invalida o catálogo cacheado: a chave antiga simplesmente deixa de ser usada."""
+    if not user_ids:
+        return
+    session.connection().execute(
+        update(UserConfig)
+        .where(UserConfig.user_id.in_(list(user_ids)))
+        .values(catalog_version=UserConfig.catalog_version + 1)
+    )
+    # A versão vive no UserConfig, então o identity cache também precisa cair
+    mark_identity_touched(session, user_ids)
+
+
+@event.listens_for(Session, 'after_flush')
+def _bump_on_catalog_change(session, flush_context):
+    # Qualquer INSERT/UPDATE/DELETE via ORM em equipamentos ou freelancers
+    user_ids = {
+        obj.user_id for obj in (*session.new, *session.dirty, *session.deleted)
+        if isinstance(obj, CATALOG_MODELS) and obj.user_id is not None
+    }
+    bump_catalog_version(session, user_ids)
+
+
+def _row(row):
+    # Dict serializável em JSON (Decimal vira string) para caber no Redis
+    return {key: str(value) if isinstance(value, Decimal) else value
+            for key, value in row._mapping.items()}
+
+
+def catalog_statements(user_id):
+    return {
+        'gears': select(Equipment.id, Equipment.name, Equipment.rental_value, Equipment.purchase_value)
+            .where(Equipment.user_id == user_id).order_by(Equipment.id),
+        'freelas': select(Freelancer.id, Freelancer.name, Freelancer.role, Freelancer.daily_rate)
+            .where(Freelancer.user_id == user_id).order_by(Freelancer.id),
+    }
+
+
+def build_catalog(results):
+    """{'gears': rows, ...} -> dicts serializáveis em JSON (Decimal vira string)."""
+    return {name: [_row(row) for row in rows] for name, rows in results.items()}
+
+
+def load_catalog(user_id):
+    return build_catalog({
+        name: db.session.execute(stmt).all() for name, stmt in catalog_statements(user_id).items()
+    })
+
+
+def catalog_cache_key(user_id, version):
+    return f'catalog:v2:{user_id}:{version}'
+
+
+def catalog_etag(user_id, version):
+    return f'catalog-{user_id}-{version}'
+
+
+def get_catalog(user_id, version, concurrent=False):
+    """
+    Catálogo do formulário de orçamento, cacheado por (usuário, versão).
+    concurrent=True faz as duas queries (equipamentos e freelas) em paralelo (app/aio.py) quando o cache falha.
+    """
+    key = catalog_cache_key(user_id, version)
+    catalog = cache.get(key)
+    if catalog is None:
+        if concurrent:
+            statements = catalog_statements(user_id)
+            catalog = build_catalog(dict(zip(statements, async_reads.fetch_all(*statements.values()))))
+        else:
+            catalog = load_catalog(user_id)
+        cache.set(key, catalog, ttl=current_app.config.get('CATALOG_CACHE_TTL', 86400))
+    return catalog
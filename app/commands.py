@@ -0,0 +1,152 @@
+import click
+
+# Comandos de manutenção expostos via 'flask <comando>'
+def register_commands(app):
+
+    @app.cli.command('rebuild-rollup')
+    @click.option('--user-id', type=int, default=None, help='Recalcula apenas um usuário.')
+    def rebuild_rollup_command(user_id):
+        """Recalcula a tabela budget_monthly_rollup a partir de 'budget'."""
+        from app.rollup import rebuild_rollup
+        rebuild_rollup(user_id)
+        click.echo('Rollup mensal recalculado.')
+
+    @app.cli.command('rebuild-search-index')
+    def rebuild_search_index_command():
+        """Recria/reindexa a busca textual (FTS5 no SQLite, índice GIN no Postgres)."""
+        from app.search import rebuild_search_index
+        rebuild_search_index()
+        click.echo('Índice de busca reconstruído.')
+
+    @app.cli.command('maintain-partitions')
+    @click.option('--years-ahead', type=int, default=1, show_default=True, help='Anos futuros com partição pronta.')
+    @click.option('--keep-years', type=int, default=None,
+                  help='Mantém anexados só os N anos mais recentes (padrão: PARTITION_KEEP_YEARS; vazio = não arquiva).')
+    @click.option('--archive-schema', default='archive', show_default=True, help='Schema para onde vão as partições antigas.')
+    @click.option('--dry-run', is_flag=True, help='Só mostra o que seria feito.')
+    def maintain_partitions_command(years_ahead, keep_years, archive_schema, dry_run):
+        """Cria as partições anuais futuras de budget/budget_item e arquiva as antigas (Postgres)."""
+        from app.partitions import maintain_partitions
+
+        if keep_years is None:
+            keep_years = app.config.get('PARTITION_KEEP_YEARS')
+        if keep_years is not None and keep_years < 1:
+            raise click.BadParameter('precisa ser pelo menos 1 (o ano atual).', param_hint='--keep-years')
+
+        try:
+            created, detached = maintain_partitions(years_ahead, keep_years, archive_schema, dry_run=dry_run)
+        except (RuntimeError, ValueError) as e:
+            raise click.ClickException(str(e))
+
+        prefix = '[dry-run] ' if dry_run else ''
+        click.echo(f"{prefix}Partições criadas: {', '.join(map(str, created)) or 'nenhuma'}")
+        click.echo(f"{prefix}Partições arquivadas em '{archive_schema}': {', '.join(map(str, detached)) or 'nenhuma'}")
+
+    @app.cli.command('sync-replica')
+    def sync_replica_command():
+        """Dev: copia o banco SQLite primário para o da réplica (REPLICA_DATABASE_URI)."""
+        from app import db
+        from app.replica import REPLICA_BIND, sync_sqlite_replica
+
+        if REPLICA_BIND not in db.engines:
+            raise click.ClickException('REPLICA_DATABASE_URI não configurada.')
+        try:
+            sync_sqlite_replica(db.engines[None], db.engines[REPLICA_BIND])
+        except RuntimeError as e:
+            raise click.ClickException(str(e))
+        click.echo('Réplica atualizada.')
+
+    @app.cli.command('reprice-pending')
+    @click.option('--user-id', type=int, required=True)
+    @click.option('--chunk-size', type=int, default=500, show_default=True)
+    def reprice_pending_command(user_id, chunk_size):
+        """Recalcula os orçamentos pendentes com o valor/hora atual do usuário."""
+        from app import db
+        from app.models import UserConfig
+        from app.pricing import reprice_pending_budgets
+
+        config = db.session.query(UserConfig).filter_by(user_id=user_id).first()
+        if not config:
+            raise click.ClickException('Usuário sem configuração (onboarding pendente).')
+
+        updated = reprice_pending_budgets(user_id, config.hourly_rate, chunk_size=chunk_size)
+        click.echo(f'{updated} orçamento(s) pendente(s) recalculado(s).')
+
+    @app.cli.command('export-budgets')
+    @click.option('--user-id', type=int, required=True)
+    @click.option('--start', type=click.DateTime(formats=['%Y-%m-%d']), default=None)
+    @click.option('--end', type=click.DateTime(formats=['%Y-%m-%d']), default=None)
+    @click.option('--status', default=None)
+    @click.option('--format', 'fmt', type=click.Choice(['csv', 'xlsx']), default='csv', show_default=True)
+    @click.option('--output', type=click.Path(dir_okay=False), required=True)
+    def export_budgets_command(user_id, start, end, status, fmt, output):
+        """Exporta orçamentos e itens do período para CSV ou XLSX."""
+        from app.export import export_rows, iter_csv, write_xlsx
+
+        rows = export_rows(user_id, start, end, status)
+        if fmt == 'xlsx':
+            write_xlsx(rows, output)
+        else:
+            with open(output, 'w', encoding='utf-8', newline='') as f:
+                for chunk in iter_csv(rows):
+                    f.write(chunk)
+        click.echo(f'Exportação salva em {output}')
+
+    @app.cli.command('import-csv')
+    @click.argument('kind', type=click.Choice(['clients', 'equipment', 'freelancers']))
+    @click.argument('path', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--user-id', type=int, required=True)
+    def import_csv_command(kind, path, user_id):
+        """Importa clientes, equipamentos ou freelancers de um CSV."""
+        from app.importer import import_csv, open_csv
+
+        with open_csv(path) as f:
+            report = import_csv(user_id, kind, f)
+
+        click.echo(f'{report.inserted} importado(s), {report.duplicates} já existiam, {len(report.errors)} com erro.')
+        for err in report.errors:
+            click.echo(f"  linha {err['line']}: {err['error']}")
+
+    @app.cli.command('run-worker')
+    @click.option('--burst', is_flag=True, help='Sai quando a fila esvaziar (em vez de esperar novos jobs).')
+    def run_worker_command(burst):
+        """Executa os jobs da fila Redis (export, importação, recálculo). Mesmo que o worker.py."""
+        import signal
+        from app.jobs import job_queue
+
+        if job_queue.is_local:
+            raise click.ClickException('Sem REDIS_URL os jobs já rodam em threads do próprio web; não há fila para consumir.')
+
+        signal.signal(signal.SIGTERM, lambda *_: job_queue.stop())
+        click.echo(f"Worker consumindo a fila ({', '.join(sorted(job_queue.tasks))}).")
+        job_queue.work(burst=burst)
+        click.echo('Worker encerrado.')
+
+    @app.cli.command('bench')
+    @click.option('--only', default=None, help='Roda só os casos cujo nome contém este texto.')
+    @click.option('--repeat', type=int, default=5, show_default=True, help='Rodadas por caso (usa a mediana).')
+    @click.option('--output', type=click.Path(dir_okay=False), default=None, help='Salva o resultado em JSON.')
+    @click.option('--baseline', type=click.Path(exists=True, dir_okay=False), default=None,
+                  help='JSON de uma execução anterior para comparar.')
+    @click.option('--tolerance', type=float, default=0.10, show_default=True,
+                  help='Variação aceita antes de contar como regressão (0.10 = 10%).')
+    def bench_command(only, repeat, output, baseline, tolerance):
+        """Micro-benchmarks dos caminhos quentes; sai com código 1 se houver regressão."""
+        import json
+        from app.bench import run_benchmarks, compare, format_comparison
+
+        current = run_benchmarks(app, only=only, repeat=repeat, echo=click.echo)
+
+        if output:
+            with open(output, 'w', encoding='utf-8') as f:
+                json.dump(current, f, indent=2, ensure_ascii=False)
+            click.echo(f'Resultado salvo em {output}')
+
+        if baseline:
+            with open(baseline, encoding='utf-8') as f:
+                rows = compare(current, json.load(f), tolerance)
+            click.echo('')
+            click.echo(format_comparison(rows))
+            regressions = [row for row in rows if row[4] == 'regressão']
+            if regressions:
+                raise click.ClickException(f'{len(regressions)} caso(s) com regressão acima de {tolerance:.0%}.')
@@ -0,0 +1,111 @@
+import csv
+import io
+from datetime import timedelta
+
+from sqlalchemy import and_, select
+
+from app import db
+from app.models import Budget, BudgetItem
+from app.money import Money
+
+EXPORT_CHUNK = 1000
+
+# Texto digitado pelo usuário que o Excel/LibreOffice interpretariam como fórmula
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+HEADER = [
+    'orcamento_id', 'data', 'cliente', 'cnpj', 'titulo', 'status',
+    'dias_trabalho', 'margem_percent', 'imposto_percent', 'custo_extra', 'custo_total', 'preco_final',
+    'item_id', 'item_nome', 'item_tipo', 'item_valor', 'item_dias', 'item_total',
+]
+
+
+def export_rows(user_id, start=None, end=None, status=None):
+    """
+    Uma linha por item (ou uma linha só para orçamento sem itens), direto do JOIN
+    budget x budget_item. Cursor no servidor (yield_per): nada é carregado inteiro na memória.
+    """
+    stmt = select(
+        Budget.id, Budget.date, Budget.client, Budget.client_cnpj, Budget.title, Budget.status,
+        Budget.labor_days, Budget.margin_percent, Budget.tax_percent, Budget.extra_cost,
+        Budget.total_cost, Budget.final_price,
+        BudgetItem.id, BudgetItem.name, BudgetItem.item_type, BudgetItem.value, BudgetItem.days,
+    ).outerjoin(BudgetItem, and_(BudgetItem.budget_id == Budget.id, BudgetItem.budget_date == Budget.date)).where(Budget.user_id == user_id)
+
+    if start:
+        stmt = stmt.where(Budget.date >= start)
+    if end:
+        stmt = stmt.where(Budget.date < end + timedelta(days=1))
+    if status:
+        stmt = stmt.where(Budget.status == status)
+
+    stmt = stmt.order_by(Budget.date, Budget.id, BudgetItem.id).execution_options(yield_per=EXPORT_CHUNK)
+
+    for row in db.session.execute(stmt):
+        row = list(row)
+        value, days = row[15], row[16]
+        row.append(Money(value * days) if value is not None and days is not None else None)
+        yield row
+
+
+def _text(value):
+    # "'" na frente faz a planilha mostrar o texto em vez de avaliar a fórmula (CSV injection)
+    return "'" + value if value.startswith(FORMULA_PREFIXES) else value
+
+
+def _cell(value):
+    # Planilha pt-BR: vírgula decimal e data sem microssegundos
+    if value is None:
+        return ''
+    if hasattr(value, 'strftime'):
+        return value.strftime('%Y-%m-%d %H:%M')
+    if hasattr(value, 'quantize'):
+        return str(value).replace('.', ',')
+    if isinstance(value, str):
+        return _text(value)
+    return value
+
+
+def iter_csv(rows, flush_every=500):
+    """Gera o CSV (';' + BOM, como o Excel em pt-BR espera) em blocos de texto."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=';')
+
+    buffer.write('\ufeff')
+    writer.writerow(HEADER)
+
+    for n, row in enumerate(rows, start=1):
+        writer.writerow([_cell(v) for v in row])
+        if n % flush_every == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue()
+
+
+def write_xlsx(rows, path):
+    """XLSX em modo constant_memory: cada linha vai para o disco assim que é escrita."""
+    import xlsxwriter
+
+    workbook = xlsxwriter.Workbook(path, {'constant_memory': True})
+    sheet = workbook.add_worksheet('Orçamentos')
+    date_format = workbook.add_format({'num_format': 'dd/mm/yyyy hh:mm'})
+    money_format = workbook.add_format({'num_format': '#,##0.00'})
+
+    sheet.write_row(0, 0, HEADER)
+    for r, row in enumerate(rows, start=1):
+        for c, value in enumerate(row):
+            if value is None:
+                continue
+            if hasattr(value, 'strftime'):
+                sheet.write_datetime(r, c, value, date_format)
+            elif hasattr(value, 'quantize'):
+                sheet.write_number(r, c, float(value), money_format)
+            elif isinstance(value, str):
+                # write() trataria '=...' como fórmula
+                sheet.write_string(r, c, _text(value))
+            else:
+                sheet.write(r, c, value)
+
+    workbook.close()
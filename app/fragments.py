@@ -0,0 +1,65 @@
+import threading
+
+from flask import current_app, render_template
+from flask_wtf.csrf import generate_csrf
+from markupsafe import Markup
+from sqlalchemy import event
+from sqlalchemy.orm import object_session
+
+from app.cache import cache
+from app.models import Budget
+
+# Sobe quando o _budget_row.html muda: todas as linhas antigas viram cache miss
+ROW_LAYOUT_VERSION = 1
+
+# O token CSRF é por sessão; o fragmento é guardado com este marcador e o token entra na hora de servir
+CSRF_PLACEHOLDER = '__csrf_token__'
+
+
+@event.listens_for(Budget, 'before_update')
+def _bump_budget_version(mapper, connection, target):
+    # Só mudanças em colunas (não na coleção de itens); UPDATEs em lote somam version na mão
+    session = object_session(target)
+    if session is not None and session.is_modified(target, include_collections=False):
+        target.version = (target.version or 0) + 1
+
+
+class RowFragments:
+    """Linhas <tr> da tabela do dashboard, cacheadas por (id do orçamento, version)."""
+
+    def __init__(self, cache):
+        self.cache = cache
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(budget):
+        return f'dashrow:v{ROW_LAYOUT_VERSION}:{budget.id}:{budget.version}'
+
+    def render(self, budgets):
+        """Lista de Markup na ordem de `budgets`; só as linhas que mudaram passam pelo Jinja."""
+        keys = [self.key(budget) for budget in budgets]
+        fragments = self.cache.get_many(keys)
+
+        missing = {}
+        for i, budget in enumerate(budgets):
+            if fragments[i] is None:
+                fragments[i] = render_template('_budget_row.html', budget=budget, csrf=CSRF_PLACEHOLDER)
+                missing[keys[i]] = fragments[i]
+
+        with self._lock:
+            self.hits += len(budgets) - len(missing)
+            self.misses += len(missing)
+
+        if missing:
+            self.cache.set_many(missing, ttl=current_app.config.get('ROW_FRAGMENT_CACHE_TTL', 86400))
+
+        token = generate_csrf()
+        return [Markup(fragment.replace(CSRF_PLACEHOLDER, token)) for fragment in fragments]
+
+    def counters(self):
+        return {'hits': self.hits, 'misses': self.misses}
+
+
+row_fragments = RowFragments(cache)
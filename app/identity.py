@@ -0,0 +1,120 @@
+from decimal import Decimal
+
+from flask import current_app
+from itsdangerous import URLSafeSerializer, BadSignature
+from sqlalchemy import event, select, Numeric
+from sqlalchemy.orm import Session, joinedload, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app import db
+from app.cache import cache
+from app.models import User, UserConfig
+from app.money import Money, MoneyType
+
+# A senha nunca vai para o cache; se algum código acessar user.password, o ORM carrega do banco
+USER_FIELDS = ('id', 'email', 'name')
+CONFIG_FIELDS = tuple(c.key for c in UserConfig.__table__.columns)
+
+
+def _key(user_id):
+    return f'identity:{user_id}'
+
+
+def _serializer():
+    # Assinado com a SECRET_KEY: um valor adulterado no Redis vira cache miss, não login
+    return URLSafeSerializer(current_app.config['SECRET_KEY'], salt='identity-cache')
+
+
+def _dump(obj, fields):
+    data = {}
+    for field in fields:
+        value = getattr(obj, field)
+        data[field] = str(value) if isinstance(value, Decimal) else value
+    return data
+
+
+def _restore(model, data):
+    # Recria o objeto como "detached" com os valores já carregados (nenhuma query)
+    columns = model.__table__.columns
+    values = {}
+    for field, value in data.items():
+        if value is not None and isinstance(columns[field].type, MoneyType):
+            value = Money(value)
+        elif value is not None and isinstance(columns[field].type, Numeric):
+            value = Decimal(value)
+        values[field] = value
+    obj = model(**values)
+    make_transient_to_detached(obj)
+    return obj
+
+
+def _from_cache(user_id):
+    token = cache.get(_key(user_id))
+    if not token:
+        return None
+    try:
+        payload = _serializer().loads(token)
+    except BadSignature:
+        return None
+
+    user = _restore(User, payload['user'])
+    config = _restore(UserConfig, payload['config']) if payload['config'] else None
+    set_committed_value(user, 'config', config)
+
+    db.session.add(user)
+    return user
+
+
+def load_identity(user_id):
+    """
+    Usuário + configuração numa única query (JOIN), em vez de get() + lazy load do config.
+    Com IDENTITY_CACHE_TTL > 0, reaproveita o par por alguns segundos sem ir ao banco.
+    """
+    ttl = current_app.config.get('IDENTITY_CACHE_TTL', 0)
+
+    if ttl:
+        user = _from_cache(user_id)
+        if user is not None:
+            return user
+
+    user = db.session.execute(
+        select(User).options(joinedload(User.config)).where(User.id == user_id)
+    ).scalar_one_or_none()
+
+    if user is not None and ttl:
+        payload = {
+            'user': _dump(user, USER_FIELDS),
+            'config': _dump(user.config, CONFIG_FIELDS) if user.config else None,
+        }
+        cache.set(_key(user_id), _serializer().dumps(payload), ttl=ttl)
+
+    return user
+
+
+def mark_identity_touched(session, user_ids):
+    session.info.setdefault('identity_touched', set()).update(user_ids)
+
+
+@event.listens_for(Session, 'after_flush')
+def _track_identity_changes(session, flush_context):
+    # Escritas de settings/onboarding (UserConfig) ou do próprio User
+    user_ids = set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, User) and obj.id is not None:
+            user_ids.add(obj.id)
+        elif isinstance(obj, UserConfig) and obj.user_id is not None:
+            user_ids.add(obj.user_id)
+    if user_ids:
+        mark_identity_touched(session, user_ids)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_identity(session):
+    touched = session.info.pop('identity_touched', None)
+    if touched:
+        cache.delete(*[_key(user_id) for user_id in touched])
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_identity(session):
+    session.info.pop('identity_touched', None)
@@ -0,0 +1,204 @@
+import codecs
+import csv
+import io
+from decimal import Decimal, InvalidOperation
+
+from sqlalchemy import select, insert
+
+from app import db
+from app.models import Client, Equipment, Freelancer
+from app.utils import safe_decimal, normalize_name
+from app.catalog import CATALOG_MODELS, bump_catalog_version
+
+IMPORT_BATCH = 500
+
+# Maior valor que cabe em MoneyType (Numeric(12, 2))
+MONEY_MAX = Decimal('9999999999.99')
+
+# Cabeçalhos aceitos (inglês = nome da coluna; português = como o usuário costuma exportar)
+ALIASES = {
+    'nome': 'name', 'empresa': 'name', 'telefone': 'phone', 'whatsapp': 'phone',
+    'endereco': 'address', 'endereço': 'address', 'cpf': 'cnpj', 'ativo': 'active',
+    'valor_compra': 'purchase_value', 'valor_aluguel': 'rental_value', 'aluguel': 'rental_value',
+    'funcao': 'role', 'função': 'role', 'diaria': 'daily_rate', 'diária': 'daily_rate',
+}
+
+# Por tipo: modelo, colunas de texto (com limite) e colunas monetárias
+KINDS = {
+    'clients': (Client, {'name': 100, 'cnpj': 20, 'phone': 20, 'address': 200}, ()),
+    'equipment': (Equipment, {'name': 100}, ('purchase_value', 'rental_value')),
+    'freelancers': (Freelancer, {'name': 100, 'role': 100}, ('daily_rate',)),
+}
+
+FALSE_VALUES = ('0', 'false', 'nao', 'não', 'n', 'inativo')
+
+# UTF-8 (com ou sem BOM), senão cp1252 (CSV do Excel em pt-BR); latin-1 aceita qualquer byte
+ENCODINGS = ('utf-8-sig', 'cp1252', 'latin-1')
+
+
+class ImportReport:
+    def __init__(self):
+        self.inserted = 0
+        self.duplicates = 0
+        self.errors = []
+
+    def error(self, line, message):
+        self.errors.append({'line': line, 'error': message})
+
+    def to_dict(self):
+        return {'inserted': self.inserted, 'duplicates': self.duplicates, 'errors': self.errors}
+
+
+def _money(raw):
+    """Aceita '1.234,56', '1234.56' e 'R$ 10'. Retorna (valor, erro)."""
+    raw = str(raw or '').replace('R$', '').strip()
+    if not raw:
+        return Decimal('0.00'), None
+    if ',' in raw and '.' in raw:
+        raw = raw.replace('.', '')
+    try:
+        value = Decimal(raw.replace(',', '.'))
+    except InvalidOperation:
+        return None, f'valor inválido: {raw}'
+    # Fora do Numeric(12, 2) o COPY/INSERT do lote inteiro falharia: vira erro só desta linha
+    if not value.is_finite() or abs(value) > MONEY_MAX:
+        return None, f'valor fora do limite: {raw}'
+    return safe_decimal(raw), None
+
+
+def _norm_header(name):
+    name = (name or '').strip().lower().replace(' ', '_')
+    return ALIASES.get(name, name)
+
+
+def detect_encoding(path, chunk_size=1 << 16):
+    """Primeira de ENCODINGS que decodifica o arquivo inteiro (lido em blocos, sem carregar tudo)."""
+    for encoding in ENCODINGS[:-1]:
+        decoder = codecs.getincrementaldecoder(encoding)()
+        try:
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(chunk_size), b''):
+                    decoder.decode(chunk)
+            decoder.decode(b'', final=True)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    return ENCODINGS[-1]
+
+
+def open_csv(path):
+    return open(path, encoding=detect_encoding(path), newline='')
+
+
+def _reader(stream):
+    # Detecta ';' (Excel pt-BR) ou ',' pela linha de cabeçalho, sem ler o arquivo inteiro
+    header = stream.readline()
+    delimiter = ';' if header.count(';') > header.count(',') else ','
+    fields = [_norm_header(h) for h in next(csv.reader([header], delimiter=delimiter), [])]
+    return csv.DictReader(stream, fieldnames=fields, delimiter=delimiter)
+
+
+def _rows(stream, report):
+    # Byte inválido na codificação vira erro no relatório; o stream de texto não tem como seguir dali
+    line = 1
+    try:
+        for line, raw in enumerate(_reader(stream), start=2):
+            yield line, raw
+    except UnicodeDecodeError:
+        report.error(line + 1, 'leitura interrompida: caracteres inválidos para a codificação do arquivo '
+                               '(salve como CSV UTF-8)')
+
+
+def _flush(connection, model, rows):
+    if not rows:
+        return
+    table = model.__table__
+    columns = list(rows[0].keys())
+
+    if connection.dialect.name == 'postgresql':
+        # COPY: o caminho mais rápido do Postgres para carga em lote
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow(['' if row[c] is None else row[c] for c in columns])
+        buffer.seek(0)
+
+        cursor = connection.connection.cursor()
+        try:
+            cursor.copy_expert(
+                f'COPY {table.name} ({", ".join(columns)}) FROM STDIN WITH (FORMAT csv)', buffer
+            )
+        finally:
+            cursor.close()
+        return
+
+    connection.execute(insert(table), rows)
+
+
+def import_csv(user_id, kind, stream):
+    """
+    Importa um CSV (stream de texto; arquivos abertos com open_csv) de clientes, equipamentos ou freelancers.
+    Linhas inválidas entram no relatório e não interrompem o resto; nomes já
+    cadastrados são ignorados, comparando por normalize_name (sem acento nem caixa,
+    a mesma chave do quick_save e do autocomplete: 'João' e 'joao' são o mesmo).
+    """
+    model, text_columns, money_columns = KINDS[kind]
+    report = ImportReport()
+
+    existing = {
+        normalize_name(name) for (name,) in db.session.execute(
+            select(model.name).where(model.user_id == user_id)
+        )
+    }
+
+    connection = db.session.connection()
+    batch = []
+
+    for line, raw in _rows(stream, report):
+        name = (raw.get('name') or '').strip()
+        if not name:
+            report.error(line, 'nome obrigatório')
+            continue
+
+        key = normalize_name(name[:100])
+        if key in existing:
+            report.duplicates += 1
+            continue
+
+        row = {'user_id': user_id}
+        for column, limit in text_columns.items():
+            value = (raw.get(column) or '').strip()[:limit]
+            row[column] = value or None
+        row['name'] = name[:100]
+
+        invalid = None
+        for column in money_columns:
+            row[column], invalid = _money(raw.get(column))
+            if invalid:
+                break
+        if invalid:
+            report.error(line, invalid)
+            continue
+
+        if kind == 'clients':
+            row['active'] = (raw.get('active') or '').strip().lower() not in FALSE_VALUES
+            # Insert em lote não passa pelo @validates do modelo
+            row['name_key'] = key
+
+        existing.add(key)
+        batch.append(row)
+
+        if len(batch) >= IMPORT_BATCH:
+            _flush(connection, model, batch)
+            report.inserted += len(batch)
+            batch = []
+
+    _flush(connection, model, batch)
+    report.inserted += len(batch)
+
+    # Insert em lote não passa pelos eventos do ORM: invalida o catálogo na mão
+    if report.inserted and model in CATALOG_MODELS:
+        bump_catalog_version(db.session, {user_id})
+
+    db.session.commit()
+    return report
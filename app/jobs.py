@@ -0,0 +1,359 @@
+"""
+Fila de tarefas pesadas (export, importação, recálculo de preços) fora do worker web.
+
+- Redis (REDIS_URL, produção): o web só enfileira; o processo 'worker' do Procfile
+  (worker.py / 'flask run-worker') executa.
+- Local (sem Redis, dev/testes): ThreadPoolExecutor dentro do próprio processo.
+
+O estado do job (queued/running/done/failed, progresso, resultado) fica no backend por
+JOB_TTL_SECONDS e é consultado em GET /api/jobs/<id>. Cada usuário tem no máximo
+JOB_MAX_PER_USER jobs na fila ou executando (o excedente recebe 429). Tarefa que levanta
+exceção é repetida até max_retries vezes, com espera crescente (JOB_RETRY_BACKOFF * 2^n).
+
+Arquivos gerados (export) vão para JOB_RESULT_DIR, que web e worker precisam enxergar
+(mesmo volume), como o PDF_CACHE_DIR.
+"""
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger('app.jobs')
+
+QUEUED, RUNNING, DONE, FAILED = 'queued', 'running', 'done', 'failed'
+FINISHED = (DONE, FAILED)
+
+# Estado devolvido ao dono do job (kwargs ficam de fora: podem ter caminhos internos)
+PUBLIC_FIELDS = ('id', 'task', 'status', 'attempts', 'progress', 'result', 'error', 'created_at', 'updated_at')
+
+
+class JobLimitExceeded(Exception):
+    """O usuário já tem JOB_MAX_PER_USER jobs na fila ou executando."""
+
+
+class JobUnavailable(Exception):
+    """Backend da fila (Redis) fora do ar."""
+
+
+class Job:
+    """O que a tarefa recebe como primeiro argumento: id, dono e atualização de progresso."""
+
+    def __init__(self, queue, state):
+        self.queue = queue
+        self.state = state
+
+    @property
+    def id(self):
+        return self.state['id']
+
+    @property
+    def user_id(self):
+        return self.state['user_id']
+
+    def progress(self, done, total=None, message=None):
+        self.state['progress'] = {'done': done, 'total': total, 'message': message}
+        self.queue.save(self.state)
+
+
+class LocalBackend:
+    """Estado em memória e execução num pool de threads do próprio processo."""
+
+    errors = ()
+
+    def __init__(self, workers=2):
+        self._states = {}
+        self._slots = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='job')
+        self.run = None
+
+    def save(self, state, ttl):
+        with self._lock:
+            self._states[state['id']] = json.loads(json.dumps(state))
+
+    def load(self, job_id):
+        with self._lock:
+            state = self._states.get(job_id)
+            return json.loads(json.dumps(state)) if state is not None else None
+
+    def acquire_slot(self, user_id, job_id, limit, is_alive):
+        with self._lock:
+            slots = self._slots.setdefault(user_id, set())
+            if len(slots) >= limit:
+                return False
+            slots.add(job_id)
+            return True
+
+    def release_slot(self, user_id, job_id):
+        with self._lock:
+            self._slots.get(user_id, set()).discard(job_id)
+
+    def push(self, job_id, delay=0):
+        if delay:
+            timer = threading.Timer(delay, self._executor.submit, args=(self.run, job_id))
+            timer.daemon = True
+            timer.start()
+        else:
+            self._executor.submit(self.run, job_id)
+
+
+class RedisBackend:
+    """
+    job:<id> (JSON com TTL), lista 'queue', zset 'delayed' (retries com espera)
+    e set user:<id> com os jobs ativos de cada usuário.
+    """
+
+    def __init__(self, url, prefix='cineorca:jobs:'):
+        import redis
+        self.errors = (redis.RedisError,)
+        self.client = redis.Redis.from_url(url, socket_connect_timeout=2)
+        self.prefix = prefix
+
+    def _key(self, *parts):
+        return self.prefix + ':'.join(str(p) for p in parts)
+
+    def save(self, state, ttl):
+        self.client.set(self._key('job', state['id']), json.dumps(state), ex=ttl)
+
+    def load(self, job_id):
+        raw = self.client.get(self._key('job', job_id))
+        return json.loads(raw) if raw is not None else None
+
+    def acquire_slot(self, user_id, job_id, limit, is_alive):
+        key = self._key('user', user_id)
+        # Slot de job que expirou ou cujo worker morreu não conta
+        for member in self.client.smembers(key):
+            member = member.decode()
+            if not is_alive(self.load(member)):
+                self.client.srem(key, member)
+
+        pipe = self.client.pipeline()
+        pipe.sadd(key, job_id)
+        pipe.scard(key)
+        _, active = pipe.execute()
+        if active > limit:
+            self.client.srem(key, job_id)
+            return False
+        return True
+
+    def release_slot(self, user_id, job_id):
+        self.client.srem(self._key('user', user_id), job_id)
+
+    def push(self, job_id, delay=0):
+        if delay:
+            self.client.zadd(self._key('delayed'), {job_id: time.time() + delay})
+        else:
+            self.client.lpush(self._key('queue'), job_id)
+
+    def pop(self, timeout=5):
+        # Retries cujo horário chegou voltam para a fila (zrem decide quem move, se houver vários workers)
+        for job_id in self.client.zrangebyscore(self._key('delayed'), 0, time.time()):
+            if self.client.zrem(self._key('delayed'), job_id):
+                self.client.lpush(self._key('queue'), job_id)
+
+        item = self.client.brpop(self._key('queue'), timeout=timeout)
+        return item[1].decode() if item else None
+
+
+class JobQueue:
+    """Fachada no estilo extensão Flask: Redis se REDIS_URL existir, senão threads locais."""
+
+    def __init__(self):
+        self.app = None
+        self.backend = None
+        self.tasks = {}
+        self.max_per_user = 2
+        self.max_retries = 2
+        self.retry_backoff = 5
+        self.ttl = 86400
+        self.stale_seconds = 3600
+        self.result_dir = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self.enqueued = 0
+        self.completed = 0
+        self.failed = 0
+        self.retried = 0
+        self.rejected = 0
+
+    def init_app(self, app):
+        self.app = app
+        self.backend = None
+        self.max_per_user = app.config.get('JOB_MAX_PER_USER', self.max_per_user)
+        self.max_retries = app.config.get('JOB_MAX_RETRIES', self.max_retries)
+        self.retry_backoff = app.config.get('JOB_RETRY_BACKOFF', self.retry_backoff)
+        self.ttl = app.config.get('JOB_TTL_SECONDS', self.ttl)
+        self.stale_seconds = app.config.get('JOB_STALE_SECONDS', self.stale_seconds)
+        self.result_dir = app.config.get('JOB_RESULT_DIR') or os.path.join(app.instance_path, 'job-results')
+
+        redis_url = app.config.get('REDIS_URL')
+        if redis_url and app.config.get('JOBS_BACKEND', 'redis') == 'redis':
+            try:
+                self.backend = RedisBackend(redis_url)
+            except ImportError:
+                app.logger.warning('Pacote redis não instalado; jobs rodando em threads locais.')
+        if self.backend is None:
+            self.backend = LocalBackend(app.config.get('JOB_LOCAL_WORKERS', 2))
+            self.backend.run = self.run
+        app.extensions['jobs'] = self
+
+    @property
+    def is_local(self):
+        return isinstance(self.backend, LocalBackend)
+
+    def task(self, name=None, max_retries=None):
+        """Registra uma tarefa: fn(job, **kwargs) -> resultado serializável em JSON."""
+        def decorator(fn):
+            # max_retries None: vale o JOB_MAX_RETRIES do app (resolvido ao enfileirar)
+            self.tasks[name or fn.__name__] = (fn, max_retries)
+            return fn
+        return decorator
+
+    def _max_retries(self, task):
+        max_retries = self.tasks[task][1]
+        return self.max_retries if max_retries is None else max_retries
+
+    # --- Web: enfileirar e consultar -------------------------------------------------
+
+    def enqueue(self, task, user_id, **kwargs):
+        """Cria o job e devolve o id. Levanta JobLimitExceeded ou JobUnavailable."""
+        if task not in self.tasks:
+            raise KeyError(f'Tarefa desconhecida: {task}')
+
+        now = time.time()
+        state = {
+            'id': uuid.uuid4().hex, 'task': task, 'user_id': user_id, 'kwargs': kwargs,
+            'status': QUEUED, 'attempts': 0, 'max_retries': self._max_retries(task),
+            'progress': {'done': 0, 'total': None, 'message': None},
+            'result': None, 'error': None, 'created_at': now, 'updated_at': now,
+        }
+        try:
+            if not self.backend.acquire_slot(user_id, state['id'], self.max_per_user, self._is_alive):
+                self._count('rejected')
+                raise JobLimitExceeded(f'Limite de {self.max_per_user} tarefa(s) simultânea(s) atingido.')
+            self.save(state)
+            self.backend.push(state['id'])
+        except self.backend.errors as e:
+            raise JobUnavailable(str(e)) from e
+
+        self._count('enqueued')
+        return state['id']
+
+    def get(self, job_id, user_id=None):
+        """Estado público do job (None se não existe, expirou ou é de outro usuário)."""
+        try:
+            state = self.backend.load(job_id)
+        except self.backend.errors as e:
+            raise JobUnavailable(str(e)) from e
+        if state is None or (user_id is not None and state['user_id'] != user_id):
+            return None
+        return {field: state.get(field) for field in PUBLIC_FIELDS}
+
+    def save(self, state):
+        state['updated_at'] = time.time()
+        self.backend.save(state, self.ttl)
+
+    def _is_alive(self, state):
+        if state is None or state['status'] in FINISHED:
+            return False
+        # 'running' sem atualização há muito tempo: o worker morreu no meio
+        return state['status'] != RUNNING or time.time() - state['updated_at'] < self.stale_seconds
+
+    # --- Worker: executar --------------------------------------------------------------
+
+    def run(self, job_id):
+        """Executa um job (no worker ou numa thread local), com retry em caso de exceção."""
+        state = self.backend.load(job_id)
+        if state is None or state['status'] in FINISHED:
+            return
+
+        fn, _ = self.tasks[state['task']]
+        state['status'] = RUNNING
+        state['attempts'] += 1
+        self.save(state)
+
+        try:
+            with self.app.app_context():
+                result = fn(Job(self, state), **state['kwargs'])
+        except Exception as e:
+            logger.exception(f"Job {job_id} ({state['task']}) falhou na tentativa {state['attempts']}")
+            state['error'] = str(e) or e.__class__.__name__
+            if state['attempts'] <= state['max_retries']:
+                state['status'] = QUEUED
+                self.save(state)
+                self.backend.push(job_id, delay=self.retry_backoff * 2 ** (state['attempts'] - 1))
+                self._count('retried')
+                return
+            state['status'] = FAILED
+            self._count('failed')
+        else:
+            state['status'] = DONE
+            state['result'] = result
+            state['error'] = None
+            self._count('completed')
+
+        self.save(state)
+        self.backend.release_slot(state['user_id'], job_id)
+
+    def work(self, burst=False):
+        """Loop do worker (só backend Redis). burst=True sai quando a fila esvazia."""
+        if self.is_local:
+            raise RuntimeError('Worker dedicado exige REDIS_URL; sem Redis os jobs rodam em threads do próprio web.')
+
+        self._stop.clear()
+        while not self._stop.is_set():
+            try:
+                job_id = self.backend.pop(timeout=1 if burst else 5)
+            except self.backend.errors as e:
+                logger.warning(f'Fila indisponível ({e}); tentando de novo.')
+                time.sleep(self.retry_backoff)
+                continue
+            if job_id is None:
+                if burst:
+                    break
+                continue
+            try:
+                self.run(job_id)
+            except self.backend.errors as e:
+                # Redis caiu no meio do job: o worker segue; o job fica 'running' até
+                # JOB_STALE_SECONDS e o slot do usuário é liberado por _is_alive
+                logger.warning(f'Fila indisponível durante o job {job_id} ({e}); seguindo.')
+                time.sleep(self.retry_backoff)
+            except Exception:
+                # Ex.: tarefa removida num deploy novo com jobs antigos na fila
+                logger.exception(f'Job {job_id} não pôde ser executado')
+
+    def stop(self):
+        # SIGTERM: termina o job atual e sai
+        self._stop.set()
+
+    def result_path(self, job_id, extension):
+        os.makedirs(self.result_dir, exist_ok=True)
+        return os.path.join(self.result_dir, f'{job_id}.{extension}')
+
+    def prune_results(self):
+        """Remove arquivos de resultado mais velhos que JOB_TTL_SECONDS (o job já expirou)."""
+        if not os.path.isdir(self.result_dir):
+            return
+        cutoff = time.time() - self.ttl
+        with os.scandir(self.result_dir) as it:
+            for entry in it:
+                try:
+                    if entry.is_file() and entry.stat().st_mtime < cutoff:
+                        os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+
+    def _count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def counters(self):
+        return {'enqueued': self.enqueued, 'completed': self.completed, 'failed': self.failed,
+                'retried': self.retried, 'rejected': self.rejected}
+
+
+job_queue = JobQueue()
@@ -0,0 +1,249 @@
+import hmac
+import os
+import time
+
+from flask import Response, request, g, abort
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+
+from app.timing import pool_checkout
+
+# Contadores internos (inteiros por processo) exportados como Counters do Prometheus.
+# nome -> (métrica, descrição, rótulos)
+INTERNAL_METRICS = {
+    'cache': ('cineorca_cache_requests_total', 'Consultas aos caches da aplicação', ['cache', 'result']),
+    'hash_calls': ('cineorca_password_hash_total', 'Hashes/verificações de senha', []),
+    'hash_rejected': ('cineorca_password_hash_rejected_total',
+                      'Hashes recusados com a fila cheia ou sem resposta a tempo (503)', []),
+    # Média por hash: rate(..._seconds_total) / rate(cineorca_password_hash_total)
+    'hash_queue_seconds': ('cineorca_password_hash_queue_seconds_total', 'Tempo esperando vaga no pool de hashing', []),
+    'hash_seconds': ('cineorca_password_hash_seconds_total', 'Tempo calculando hashes/verificações', []),
+    'routed_reads': ('cineorca_db_routed_reads_total',
+                     'SELECTs das views @replica_reads por destino (réplica ou primário e motivo)', ['target']),
+    'pool_events': ('cineorca_db_pool_events_total',
+                    'Conexões abertas, testes após ociosidade, conexões mortas e retries', ['event']),
+    'jobs': ('cineorca_jobs_total',
+             'Jobs da fila: enfileirados, concluídos, falhos, repetidos e recusados pelo limite', ['event']),
+}
+
+
+# (nome em INTERNAL_METRICS, rótulos, valor acumulado no processo)
+def _internal_counters():
+    from app.stats import dashboard_stats
+    from app.fragments import row_fragments
+    from app.pdf import pdf_store
+    from app.passwords import password_hasher
+    from app.replica import replica_router
+    from app.pooling import pool_policy
+    from app.jobs import job_queue
+
+    dashboard = dashboard_stats.counters()
+    rows = row_fragments.counters()
+    pdfs = pdf_store.counters()
+    hashing = password_hasher.metrics()
+    routed = replica_router.counters()
+    pool = pool_policy.counters()
+    jobs = job_queue.counters()
+    return [
+        ('cache', {'cache': 'dashboard', 'result': 'hit'}, dashboard['hits']),
+        ('cache', {'cache': 'dashboard', 'result': 'miss'}, dashboard['misses']),
+        ('cache', {'cache': 'dashboard_rows', 'result': 'hit'}, rows['hits']),
+        ('cache', {'cache': 'dashboard_rows', 'result': 'miss'}, rows['misses']),
+        ('cache', {'cache': 'pdf', 'result': 'hit'}, pdfs['hits']),
+        ('cache', {'cache': 'pdf', 'result': 'miss'}, pdfs['misses']),
+        ('hash_calls', {}, hashing['calls']),
+        ('hash_rejected', {}, hashing['rejected']),
+        ('hash_queue_seconds', {}, hashing['queue_seconds_total']),
+        ('hash_seconds', {}, hashing['hash_seconds_total']),
+        ('routed_reads', {'target': 'replica'}, routed['replica']),
+        ('routed_reads', {'target': 'primary_pinned'}, routed['primary_pinned']),
+        ('routed_reads', {'target': 'primary_lag'}, routed['primary_lag']),
+        ('pool_events', {'event': 'connect'}, pool['connects']),
+        ('pool_events', {'event': 'idle_ping'}, pool['pings']),
+        ('pool_events', {'event': 'stale'}, pool['stale']),
+        ('pool_events', {'event': 'invalidated'}, pool['invalidated']),
+        ('pool_events', {'event': 'retry'}, pool['retries']),
+        ('jobs', {'event': 'enqueued'}, jobs['enqueued']),
+        ('jobs', {'event': 'completed'}, jobs['completed']),
+        ('jobs', {'event': 'failed'}, jobs['failed']),
+        ('jobs', {'event': 'retried'}, jobs['retried']),
+        ('jobs', {'event': 'rejected'}, jobs['rejected']),
+    ]
+
+
+class InternalCollector:
+    """Lê os contadores internos na hora do scrape: nenhum custo por request."""
+
+    def describe(self):
+        from prometheus_client.core import CounterMetricFamily
+        return [CounterMetricFamily(metric, doc, labels=labels) for metric, doc, labels in INTERNAL_METRICS.values()]
+
+    def collect(self):
+        from prometheus_client.core import CounterMetricFamily
+
+        families = {}
+        for name, labels, value in _internal_counters():
+            metric, doc, labelnames = INTERNAL_METRICS[name]
+            if name not in families:
+                families[name] = CounterMetricFamily(metric, doc, labels=labelnames)
+            families[name].add_metric([labels[label] for label in labelnames], value)
+        return list(families.values())
+
+
+class Metrics:
+    """
+    /metrics no formato do Prometheus.
+
+    Com PROMETHEUS_MULTIPROC_DIR definido (Gunicorn com vários workers) cada processo grava
+    seus valores em arquivos nesse diretório e o scrape soma todos (MultiProcessCollector);
+    o gunicorn.conf.py limpa o diretório no start e marca workers mortos.
+
+    Os contadores internos (caches, hashing, réplica, pool, jobs) são lidos no scrape por um
+    collector. No modo multiprocesso o scrape só enxerga os arquivos, então cada worker copia os
+    seus para Counters no máximo a cada METRICS_SYNC_SECONDS (e o worker do scrape, na hora).
+
+    Razão de acerto do cache, por exemplo:
+      sum by (cache) (rate(cineorca_cache_requests_total{result="hit"}[5m]))
+        / sum by (cache) (rate(cineorca_cache_requests_total[5m]))
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.token = None
+        self._metrics = None
+        self._seen = {}
+        self.multiprocess = False
+        self.sync_seconds = 15
+        self._synced_at = 0.0
+
+    def init_app(self, app, db=None):
+        self.token = app.config.get('METRICS_TOKEN')
+        app.extensions['metrics'] = self
+        app.add_url_rule('/metrics', 'metrics', self.view)
+
+        if not app.config.get('METRICS_ENABLED', True):
+            return
+        try:
+            import prometheus_client  # noqa: F401
+        except ImportError:
+            app.logger.warning('prometheus_client não instalado; /metrics desligado.')
+            return
+
+        self.enabled = True
+        self.sync_seconds = app.config.get('METRICS_SYNC_SECONDS', 15)
+        if self._metrics is None:
+            self.multiprocess = bool(os.environ.get('PROMETHEUS_MULTIPROC_DIR'))
+            self._metrics = self._create_metrics()
+            if not self.multiprocess:
+                from prometheus_client import REGISTRY
+                REGISTRY.register(InternalCollector())
+
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        pool_checkout.connect(self._pool_checkout)
+
+        if db is not None:
+            with app.app_context():
+                self._watch_pool(db.engine.pool)
+
+    def _create_metrics(self):
+        from prometheus_client import Counter, Gauge, Histogram
+
+        metrics = {
+            'latency': Histogram(
+                'cineorca_request_duration_seconds', 'Duração dos requests por endpoint',
+                ['endpoint', 'method'],
+                buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+            ),
+            'requests': Counter('cineorca_requests_total', 'Requests por endpoint e status',
+                                ['endpoint', 'method', 'status']),
+            'rate_limited': Counter('cineorca_rate_limit_rejections_total',
+                                    'Requests recusados pelo rate limiter (429)', ['endpoint']),
+            'pool_checked_out': Gauge('cineorca_db_pool_checked_out', 'Conexões em uso',
+                                      multiprocess_mode='livesum'),
+            'pool_overflow': Gauge('cineorca_db_pool_overflow', 'Conexões acima do pool_size',
+                                   multiprocess_mode='livesum'),
+            'pool_size': Gauge('cineorca_db_pool_size', 'pool_size configurado',
+                               multiprocess_mode='livesum'),
+            'pool_wait': Histogram(
+                'cineorca_db_pool_checkout_seconds', 'Tempo para obter conexão (fila + pre-ping)',
+                buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5, 30)
+            ),
+        }
+        if self.multiprocess:
+            # Sem acesso à memória dos outros workers no scrape: os internos viram Counters em arquivo
+            for name, (metric, doc, labels) in INTERNAL_METRICS.items():
+                metrics[name] = Counter(metric, doc, labels)
+        return metrics
+
+    # --- Coleta -------------------------------------------------------------------
+
+    def _start(self):
+        g._metrics_started_at = time.perf_counter()
+
+    def _finish(self, response):
+        started_at = g.pop('_metrics_started_at', None)
+        if started_at is None or request.endpoint == 'metrics':
+            return response
+
+        endpoint = request.endpoint or 'not_found'
+        method = request.method
+        self._metrics['latency'].labels(endpoint, method).observe(time.perf_counter() - started_at)
+        self._metrics['requests'].labels(endpoint, method, str(response.status_code)).inc()
+        if response.status_code == 429:
+            self._metrics['rate_limited'].labels(endpoint).inc()
+
+        if self.multiprocess and time.monotonic() - self._synced_at >= self.sync_seconds:
+            self._sync_counters()
+        return response
+
+    def _sync_counters(self):
+        # Os contadores internos são inteiros do processo: soma no Counter só a diferença desde a última vez
+        for name, labels, value in _internal_counters():
+            key = (name, tuple(sorted(labels.items())))
+            delta = value - self._seen.get(key, 0)
+            if delta > 0:
+                metric = self._metrics[name]
+                (metric.labels(**labels) if labels else metric).inc(delta)
+            self._seen[key] = value
+        self._synced_at = time.monotonic()
+
+    def _pool_checkout(self, sender, seconds=0.0, **extra):
+        if self.enabled:
+            self._metrics['pool_wait'].observe(seconds)
+
+    def _watch_pool(self, pool):
+        if not isinstance(pool, QueuePool):
+            return
+        metrics = self._metrics
+
+        def update(*args):
+            metrics['pool_checked_out'].set(pool.checkedout())
+            metrics['pool_overflow'].set(max(pool.overflow(), 0))
+
+        metrics['pool_size'].set(pool.size())
+        event.listen(pool, 'checkout', update)
+        event.listen(pool, 'checkin', update)
+
+    # --- Endpoint -------------------------------------------------------------------
+
+    def view(self):
+        if not self.enabled:
+            abort(501, description='Métricas indisponíveis (instale prometheus_client).')
+
+        if self.token and not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {self.token}'):
+            abort(401)
+
+        from prometheus_client import CollectorRegistry, CONTENT_TYPE_LATEST, REGISTRY, generate_latest
+
+        if self.multiprocess:
+            from prometheus_client import multiprocess
+            self._sync_counters()
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        else:
+            registry = REGISTRY
+        return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
+
+
+metrics = Metrics()
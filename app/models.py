@@ -2,6 +2,9 @@ from app import db
 from flask_login import UserMixin
 from datetime import datetime
 from sqlalchemy import Index
+from sqlalchemy.orm import validates
+from app.money import Money, MoneyType
+from app.utils import normalize_name
 
 class User(UserMixin, db.Model):
     __tablename__ = 'user'
@@ -20,8 +23,8 @@ class UserConfig(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), unique=True, nullable=False)
 
-    monthly_goal = db.Column(db.Numeric(12, 2), default=0.00)
-    hourly_rate = db.Column(db.Numeric(12, 2), default=0.00)
+    monthly_goal = db.Column(MoneyType(), default=0.00)
+    hourly_rate = db.Column(MoneyType(), default=0.00)
     company_name = db.Column(db.String(100))
     cnpj = db.Column(db.String(20))
     address = db.Column(db.String(200))
@@ -29,6 +32,9 @@ class UserConfig(db.Model):
     logo_url = db.Column(db.String(500))
     brand_color = db.Column(db.String(7), default='#00ffa3')
 
+    # Incrementado a cada alteração em clientes/equipamentos/freelancers (ver app/catalog.py)
+    catalog_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
 class Client(db.Model):
     __tablename__ = 'client'
     id = db.Column(db.Integer, primary_key=True)
@@ -40,6 +46,18 @@ class Client(db.Model):
     phone = db.Column(db.String(20))
     address = db.Column(db.String(200))
     active = db.Column(db.Boolean, default=True, index=True) # Índice para filtrar ativos rapidamente
+    # Nome sem acento/caixa (normalize_name): autocomplete e "já existe?" do cadastro rápido
+    name_key = db.Column(db.String(100))
+
+    @validates('name')
+    def _sync_name_key(self, key, value):
+        self.name_key = normalize_name(value)
+        return value
+
+    __table_args__ = (
+        # Prefixo do nome dentro dos clientes do usuário (no Postgres há também um GIN trigram)
+        Index('idx_client_user_name_key', 'user_id', 'name_key'),
+    )
 
 class Equipment(db.Model):
     __tablename__ = 'equipment'
@@ -47,8 +65,8 @@ class Equipment(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
 
     name = db.Column(db.String(100), nullable=False)
-    purchase_value = db.Column(db.Numeric(12, 2), default=0.00)
-    rental_value = db.Column(db.Numeric(12, 2), default=0.00)
+    purchase_value = db.Column(MoneyType(), default=0.00)
+    rental_value = db.Column(MoneyType(), default=0.00)
 
 class Freelancer(db.Model):
     __tablename__ = 'freelancer'
@@ -57,7 +75,7 @@ class Freelancer(db.Model):
 
     name = db.Column(db.String(100), nullable=False)
     role = db.Column(db.String(100))
-    daily_rate = db.Column(db.Numeric(12, 2), default=0.00)
+    daily_rate = db.Column(MoneyType(), default=0.00)
 
 class Budget(db.Model):
     __tablename__ = 'budget'
@@ -79,11 +97,40 @@ class Budget(db.Model):
     labor_days = db.Column(db.Numeric(10, 2), default=0.00)
     margin_percent = db.Column(db.Integer, default=30)
     tax_percent = db.Column(db.Numeric(5, 2), default=0.00) 
-    extra_cost = db.Column(db.Numeric(12, 2), default=0.00)
-    total_cost = db.Column(db.Numeric(12, 2), default=0.00)
-    final_price = db.Column(db.Numeric(12, 2), default=0.00)
-
-    items = db.relationship('BudgetItem', backref='budget', lazy=True, cascade="all, delete-orphan")
+    extra_cost = db.Column(MoneyType(), default=0.00)
+    total_cost = db.Column(MoneyType(), default=0.00)
+    final_price = db.Column(MoneyType(), default=0.00)
+
+    # Controle de alterações: version sobe a cada UPDATE (chave do cache de linhas do dashboard)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Join por (id, date): o ORM preenche budget_item.budget_date e, no Postgres particionado,
+    # a busca dos itens fica só na partição do ano do orçamento
+    items = db.relationship('BudgetItem', backref='budget', lazy=True, cascade="all, delete-orphan",
+                            primaryjoin='and_(Budget.id == foreign(BudgetItem.budget_id), '
+                                        'Budget.date == foreign(BudgetItem.budget_date))')
+
+    def to_dict(self, include_items=True):
+        data = {
+            'id': self.id,
+            'client': self.client,
+            'client_cnpj': self.client_cnpj,
+            'title': self.title,
+            'description': self.description,
+            'date': self.date.isoformat() if self.date else None,
+            'status': self.status,
+            # Decimais como string ('1234.56'): exatos no JSON, sem passar por float
+            'labor_days': str(self.labor_days) if self.labor_days is not None else '0.00',
+            'margin_percent': self.margin_percent,
+            'tax_percent': str(self.tax_percent) if self.tax_percent is not None else '0.00',
+            'extra_cost': str(Money(self.extra_cost)),
+            'total_cost': str(Money(self.total_cost)),
+            'final_price': str(Money(self.final_price)),
+        }
+        if include_items:
+            data['items'] = [item.to_dict() for item in self.items]
+        return data
 
     # ÍNDICES COMPOSTOS PARA DASHBOARD
     __table_args__ = (
@@ -97,16 +144,31 @@ class BudgetItem(db.Model):
     __tablename__ = 'budget_item'
     id = db.Column(db.Integer, primary_key=True)
     budget_id = db.Column(db.Integer, db.ForeignKey('budget.id'), nullable=False, index=True)
+    # Cópia de Budget.date: chave de partição do budget_item no Postgres (ver app/partitions.py)
+    budget_date = db.Column(db.DateTime)
 
     name = db.Column(db.String(100), nullable=False)
     item_type = db.Column(db.String(20))
-    value = db.Column(db.Numeric(12, 2), default=0.00)
+    value = db.Column(MoneyType(), default=0.00)
     days = db.Column(db.Numeric(10, 2), default=1.00)
 
     def to_dict(self):
         return {
+            'id': self.id,
             'name': self.name,
             'type': self.item_type,
-            'value': float(self.value) if self.value is not None else 0.0,
-            'days': float(self.days) if self.days is not None else 1.0
-        }
\ No newline at end of file
+            'value': str(Money(self.value)),
+            'days': str(self.days) if self.days is not None else '1.00'
+        }
+
+class BudgetMonthlyRollup(db.Model):
+    # Agregado mensal por status, mantido pelos eventos em app/rollup.py.
+    # O dashboard lê no máximo 12 x 3 linhas daqui em vez de varrer 'budget'.
+    __tablename__ = 'budget_monthly_rollup'
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    year = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    month = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    status = db.Column(db.String(20), primary_key=True)
+
+    total = db.Column(MoneyType(14, 2), nullable=False, default=0)
+    count = db.Column(db.Integer, nullable=False, default=0)
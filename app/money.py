@@ -0,0 +1,85 @@
+from decimal import Decimal, ROUND_HALF_UP
+
+from sqlalchemy.types import TypeDecorator, Numeric
+
+CENTS = Decimal('0.01')
+
+
+class Money(Decimal):
+    """
+    Valor em reais: um Decimal sempre com 2 casas (ROUND_HALF_UP).
+    Soma/subtração entre Money (ou com int) continua Money; multiplicação e divisão
+    devolvem Decimal e o arredondamento fica explícito em quem chama (Money(...)).
+    Sem __dict__ por instância: o custo de memória é o do próprio Decimal.
+    """
+    __slots__ = ()
+
+    def __new__(cls, value=0):
+        if value is None:
+            value = 0
+        elif isinstance(value, float):
+            # repr evita a expansão binária do float (0.1 -> 0.1000000000000000055...)
+            value = repr(value)
+        value = value if isinstance(value, Decimal) else Decimal(value)
+        return super().__new__(cls, value.quantize(CENTS, rounding=ROUND_HALF_UP))
+
+    def _wrap(self, result, other):
+        if result is NotImplemented or not isinstance(other, (Money, int)):
+            return result
+        return Money(result)
+
+    def __add__(self, other):
+        return self._wrap(Decimal.__add__(self, other), other)
+
+    def __radd__(self, other):
+        return self._wrap(Decimal.__radd__(self, other), other)
+
+    def __sub__(self, other):
+        return self._wrap(Decimal.__sub__(self, other), other)
+
+    def __rsub__(self, other):
+        return self._wrap(Decimal.__rsub__(self, other), other)
+
+    def __neg__(self):
+        return Money(Decimal.__neg__(self))
+
+    def __abs__(self):
+        return Money(Decimal.__abs__(self))
+
+    def __repr__(self):
+        return f"Money('{self}')"
+
+    def brl(self):
+        return format_brl(self)
+
+
+ZERO = Money(0)
+
+
+def format_brl(value):
+    """'1.234,56' direto do Decimal, sem passar por float."""
+    if isinstance(value, Decimal):
+        # quantize direto (mesmo ROUND_HALF_UP do Money) sai mais barato que construir a subclasse
+        if not isinstance(value, Money):
+            value = value.quantize(CENTS, rounding=ROUND_HALF_UP)
+    else:
+        value = Money(value)
+    # Com 2 casas: '1,234.56' -> troca só o separador de milhar e remonta os centavos
+    text = format(value, ',f')
+    return text[:-3].replace(',', '.') + ',' + text[-2:]
+
+
+class MoneyType(TypeDecorator):
+    """Numeric(12, 2) que devolve Money na leitura (ORM e Core)."""
+    impl = Numeric
+    cache_ok = True
+
+    def __init__(self, precision=12, scale=2):
+        super().__init__(precision, scale)
+
+    def process_bind_param(self, value, dialect):
+        # Decimal puro para o driver (psycopg2/asyncpg/sqlite não conhecem a subclasse)
+        return None if value is None else Decimal(Money(value))
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else Money(value)
@@ -0,0 +1,81 @@
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import tuple_
+
+
+def encode_cursor(date, id, direction):
+    """Token opaco para a URL: posição (date, id) + direção ('next' ou 'prev')."""
+    raw = json.dumps([date.isoformat() if date else None, id, direction], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    # Token inválido/adulterado volta para a primeira página em vez de dar erro
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        date_str, id, direction = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if direction not in ('next', 'prev'):
+            return None
+        return datetime.fromisoformat(date_str), int(id), direction
+    except (ValueError, TypeError, json.JSONDecodeError):
+        return None
+
+
+class KeysetPage:
+    def __init__(self, items, has_next, has_prev, date_col, id_col):
+        self.items = items
+        self.has_next = has_next
+        self.has_prev = has_prev
+        self._date_attr = date_col.key
+        self._id_attr = id_col.key
+
+    def _cursor(self, item, direction):
+        return encode_cursor(getattr(item, self._date_attr), getattr(item, self._id_attr), direction)
+
+    @property
+    def next_cursor(self):
+        return self._cursor(self.items[-1], 'next') if self.has_next and self.items else None
+
+    @property
+    def prev_cursor(self):
+        return self._cursor(self.items[0], 'prev') if self.has_prev and self.items else None
+
+
+def keyset_statement(query, date_col, id_col, per_page, cursor):
+    """Aplica filtro/ordem/limite do seek. Serve para Query (ORM) e para select() (Core/async)."""
+    position = decode_cursor(cursor)
+
+    if position is None:
+        return query.order_by(date_col.desc(), id_col.desc()).limit(per_page + 1), None
+
+    date, id, direction = position
+
+    if direction == 'next':
+        return query.filter(tuple_(date_col, id_col) < tuple_(date, id)) \
+            .order_by(date_col.desc(), id_col.desc()).limit(per_page + 1), direction
+
+    # Voltando: busca em ordem crescente a partir do cursor (a página é invertida depois)
+    return query.filter(tuple_(date_col, id_col) > tuple_(date, id)) \
+        .order_by(date_col.asc(), id_col.asc()).limit(per_page + 1), direction
+
+
+def keyset_page(rows, direction, date_col, id_col, per_page):
+    if direction is None:
+        return KeysetPage(rows[:per_page], len(rows) > per_page, False, date_col, id_col)
+    if direction == 'next':
+        return KeysetPage(rows[:per_page], len(rows) > per_page, True, date_col, id_col)
+    items = list(reversed(rows[:per_page]))
+    return KeysetPage(items, True, len(rows) > per_page, date_col, id_col)
+
+
+def keyset_paginate(query, date_col, id_col, per_page=10, cursor=None):
+    """
+    Paginação por seek em (date DESC, id DESC): WHERE (date, id) < cursor LIMIT n+1.
+    Custo constante em qualquer profundidade, sem COUNT(*) e sem OFFSET.
+    """
+    stmt, direction = keyset_statement(query, date_col, id_col, per_page, cursor)
+    return keyset_page(stmt.all(), direction, date_col, id_col, per_page)
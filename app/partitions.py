@@ -0,0 +1,111 @@
+"""
+Manutenção das partições anuais de budget/budget_item (Postgres, migração a91c6e3f5d28).
+
+Cada ano tem um par budget_y<ano> / budget_item_y<ano> com os mesmos limites, e o item
+referencia o orçamento por (budget_id, budget_date), então os dois andam sempre juntos:
+- ensure_partitions cria os pares dos próximos anos (sem partição, o INSERT falha);
+- detach_partitions desanexa os anos antigos para o schema de arquivo, com a FK do item
+  apontando para o orçamento arquivado. Saem da busca, da listagem e do export; o rollup
+  mensal continua com os totais até o próximo 'flask rebuild-rollup'.
+"""
+import re
+from datetime import datetime
+
+from sqlalchemy import text
+
+from app import db
+
+PARTITIONED = (('budget', 'date'), ('budget_item', 'budget_date'))
+
+
+def partition_name(table, year):
+    return f'{table}_y{year}'
+
+
+def is_partitioned(conn):
+    if conn.dialect.name != 'postgresql':
+        return False
+    return conn.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid "
+        "WHERE c.relname = 'budget' AND c.relnamespace = current_schema()::regnamespace)"
+    )).scalar()
+
+
+def partition_years(conn, table='budget'):
+    """Anos com partição anexada, em ordem (pelo nome: <tabela>_y<ano>)."""
+    names = conn.execute(text(
+        'SELECT c.relname FROM pg_inherits i '
+        'JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent '
+        'WHERE p.relname = :table AND p.relnamespace = current_schema()::regnamespace'
+    ), {'table': table}).scalars()
+    pattern = re.compile(rf'^{table}_y(\d{{4}})$')
+    return sorted(int(m.group(1)) for m in map(pattern.match, names) if m)
+
+
+def ensure_partitions(conn, years_ahead=1, dry_run=False):
+    """Cria os pares de partições do ano atual até years_ahead anos à frente. Devolve os anos criados."""
+    existing = set(partition_years(conn))
+    current = datetime.utcnow().year
+    created = []
+    for year in range(current, current + years_ahead + 1):
+        if year in existing:
+            continue
+        created.append(year)
+        if dry_run:
+            continue
+        bounds = f"FROM ('{year}-01-01') TO ('{year + 1}-01-01')"
+        for table, _ in PARTITIONED:
+            conn.exec_driver_sql(
+                f'CREATE TABLE IF NOT EXISTS {partition_name(table, year)} PARTITION OF {table} FOR VALUES {bounds}'
+            )
+    return created
+
+
+def detach_partitions(conn, keep_years, archive_schema='archive', dry_run=False):
+    """
+    Desanexa os anos anteriores aos keep_years mais recentes (contando o atual) e move
+    os pares para archive_schema. Devolve os anos desanexados.
+    """
+    if not re.match(r'^[a-z_][a-z0-9_]*$', archive_schema):
+        raise ValueError(f'Nome de schema inválido: {archive_schema}')
+
+    cutoff = datetime.utcnow().year - keep_years + 1
+    old = [year for year in partition_years(conn) if year < cutoff]
+    if dry_run or not old:
+        return old
+
+    conn.exec_driver_sql(f'CREATE SCHEMA IF NOT EXISTS {archive_schema}')
+    for year in old:
+        budget_part = partition_name('budget', year)
+        item_part = partition_name('budget_item', year)
+
+        # Itens primeiro: o DETACH do orçamento falha enquanto houver FK apontando para as linhas.
+        # Ao desanexar, a FK para 'budget' vira constraint própria da partição: troca pela do arquivo.
+        conn.exec_driver_sql(f'ALTER TABLE budget_item DETACH PARTITION {item_part}')
+        for (name,) in conn.execute(text(
+            "SELECT conname FROM pg_constraint WHERE conrelid = CAST(:rel AS regclass) AND contype = 'f'"
+        ), {'rel': item_part}):
+            conn.exec_driver_sql(f'ALTER TABLE {item_part} DROP CONSTRAINT "{name}"')
+        conn.exec_driver_sql(f'ALTER TABLE budget DETACH PARTITION {budget_part}')
+        conn.exec_driver_sql(
+            f'ALTER TABLE {item_part} ADD CONSTRAINT {item_part}_budget_fkey '
+            f'FOREIGN KEY (budget_id, budget_date) REFERENCES {budget_part} (id, date) ON DELETE CASCADE'
+        )
+        conn.exec_driver_sql(f'ALTER TABLE {budget_part} SET SCHEMA {archive_schema}')
+        conn.exec_driver_sql(f'ALTER TABLE {item_part} SET SCHEMA {archive_schema}')
+    return old
+
+
+def maintain_partitions(years_ahead=1, keep_years=None, archive_schema='archive', dry_run=False):
+    """Cria as partições futuras e, com keep_years, arquiva as antigas. Tudo numa transação."""
+    conn = db.session.connection()
+    if not is_partitioned(conn):
+        raise RuntimeError('A tabela budget não é particionada (só no Postgres, após a migração a91c6e3f5d28).')
+
+    created = ensure_partitions(conn, years_ahead=years_ahead, dry_run=dry_run)
+    detached = detach_partitions(conn, keep_years, archive_schema, dry_run=dry_run) if keep_years else []
+    if dry_run:
+        db.session.rollback()
+    else:
+        db.session.commit()
+    return created, detached
@@ -0,0 +1,149 @@
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+from werkzeug.security import generate_password_hash, check_password_hash, DEFAULT_PBKDF2_ITERATIONS
+
+
+class HashingBusy(Exception):
+    """Fila de hashing cheia (ou hash sem resposta a tempo): melhor devolver 503 do que prender o worker."""
+
+
+def normalize_method(method):
+    # 'pbkdf2:sha256' -> 'pbkdf2:sha256:<iterações padrão>', para comparar com o prefixo do hash salvo
+    parts = method.split(':')
+    if parts[0] == 'pbkdf2':
+        if len(parts) == 1:
+            parts.append('sha256')
+        if len(parts) == 2:
+            parts.append(str(DEFAULT_PBKDF2_ITERATIONS))
+    elif parts[0] == 'scrypt' and len(parts) == 1:
+        parts += ['32768', '8', '1']
+    return ':'.join(parts)
+
+
+class PasswordHasher:
+    """
+    Hash/verificação de senha fora do worker web: um ProcessPool pequeno faz o trabalho
+    de CPU e um semáforo limita quantos logins simultâneos podem estar na fila.
+    Com PASSWORD_HASH_WORKERS = 0 roda inline (dev/testes), mantendo o limite e as métricas.
+    """
+
+    def __init__(self):
+        self.method = normalize_method('pbkdf2:sha256')
+        self.workers = 0
+        self.timeout = 10
+        self._slots = threading.BoundedSemaphore(4)
+        self._pool = None
+        self._pool_pid = None
+        self._lock = threading.Lock()
+
+        self.calls = 0
+        self.rejected = 0
+        self.queue_seconds_total = 0.0
+        self.hash_seconds_total = 0.0
+
+    def init_app(self, app):
+        self.method = normalize_method(app.config.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256'))
+        self.workers = app.config.get('PASSWORD_HASH_WORKERS', 0)
+        self.timeout = app.config.get('PASSWORD_HASH_TIMEOUT', 10)
+        self._slots = threading.BoundedSemaphore(app.config.get('PASSWORD_HASH_MAX_CONCURRENCY', 4))
+        app.extensions['password_hasher'] = self
+
+    def _executor(self):
+        # O pool é criado no primeiro uso dentro de cada worker (não atravessa o fork do Gunicorn)
+        with self._lock:
+            if self._pool is None or self._pool_pid != os.getpid():
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+                self._pool_pid = os.getpid()
+            return self._pool
+
+    def _discard(self, pool):
+        # Um filho morto (OOM, segfault) quebra o ProcessPool para sempre: o próximo uso cria outro
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False)
+
+    def _reject(self):
+        with self._lock:
+            self.rejected += 1
+        raise HashingBusy()
+
+    def _run_in_pool(self, func, args, deadline):
+        # A vaga só volta quando o último futuro terminar de fato (concluído, cancelado ou pool
+        # quebrado): cancel() não interrompe um hash já em andamento
+        future = None
+        try:
+            for _ in range(2):
+                pool = self._executor()
+                try:
+                    future = pool.submit(func, *args)
+                except BrokenProcessPool:
+                    future = None
+                    self._discard(pool)
+                    continue
+                try:
+                    return future.result(timeout=max(deadline - time.perf_counter(), 0))
+                except FutureTimeout:
+                    # Pool saturado: tira da fila se ainda não começou e responde 503
+                    future.cancel()
+                    self._reject()
+                except BrokenProcessPool:
+                    self._discard(pool)
+            self._reject()
+        finally:
+            if future is None:
+                self._slots.release()
+            else:
+                future.add_done_callback(lambda _: self._slots.release())
+
+    def _run(self, func, *args):
+        # Espera pela vaga e pelo hash contam no mesmo prazo (PASSWORD_HASH_TIMEOUT)
+        queued_at = time.perf_counter()
+        deadline = queued_at + self.timeout
+        if not self._slots.acquire(timeout=self.timeout):
+            self._reject()
+
+        started_at = time.perf_counter()
+        if self.workers:
+            result = self._run_in_pool(func, args, deadline)
+        else:
+            try:
+                result = func(*args)
+            finally:
+                self._slots.release()
+
+        finished_at = time.perf_counter()
+        with self._lock:
+            # Esperando vaga/processo livre vs. calculando o hash
+            waited = started_at - queued_at
+            self.calls += 1
+            self.queue_seconds_total += waited
+            self.hash_seconds_total += finished_at - started_at
+        return result
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, pwhash, password):
+        if not pwhash:
+            return False
+        return self._run(check_password_hash, pwhash, password)
+
+    def needs_rehash(self, pwhash):
+        # Hash salvo com parâmetros diferentes dos atuais (ex.: custo aumentado)
+        return pwhash.split('$', 1)[0] != self.method
+
+    def metrics(self):
+        return {
+            'calls': self.calls,
+            'rejected': self.rejected,
+            'queue_seconds_total': self.queue_seconds_total,
+            'hash_seconds_total': self.hash_seconds_total,
+        }
+
+
+password_hasher = PasswordHasher()
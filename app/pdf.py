@@ -0,0 +1,220 @@
+import hashlib
+import http.client
+import ipaddress
+import json
+import os
+import socket
+import ssl
+import threading
+from urllib.parse import urljoin, urlsplit
+from datetime import date, datetime
+from decimal import Decimal
+
+# Sobe quando o budget_pdf.html muda de layout: todos os PDFs antigos viram cache miss
+PDF_LAYOUT_VERSION = 2
+
+BUDGET_FIELDS = ('id', 'client', 'client_cnpj', 'client_phone', 'title', 'description', 'date',
+                 'labor_days', 'extra_cost', 'tax_percent', 'total_cost', 'final_price')
+ITEM_FIELDS = ('name', 'item_type', 'value', 'days')
+# Só o que aparece no documento (marca + hourly_rate, usado na linha de mão de obra)
+BRANDING_FIELDS = ('company_name', 'logo_url', 'brand_color', 'address', 'cnpj', 'whatsapp', 'hourly_rate')
+
+
+# Imagens externas do PDF (logo_url): limite de tempo, tamanho e redirects
+FETCH_TIMEOUT = 5
+FETCH_MAX_BYTES = 5 * 1024 * 1024
+FETCH_MAX_REDIRECTS = 3
+
+
+class PdfUnavailable(Exception):
+    """
+    Renderizador de PDF (WeasyPrint) não instalado ou sem as bibliotecas nativas.
+    Deploy: além do pacote Python, o sistema precisa de Pango/HarfBuzz (Debian/Ubuntu:
+    libpango-1.0-0 libpangoft2-1.0-0 libharfbuzz0b); sem elas a rota do PDF responde 501.
+    """
+
+
+def _public_address(host, port):
+    """Resolve o host e só aceita se TODOS os endereços forem públicos (nada de 10/8, 127/8, 169.254/16...)."""
+    try:
+        infos = socket.getaddrinfo(host, port, proto=socket.IPPROTO_TCP)
+    except socket.gaierror:
+        raise ValueError(f'Host não resolvido: {host}')
+
+    addresses = []
+    for info in infos:
+        ip = ipaddress.ip_address(info[4][0].split('%')[0])
+        ip = getattr(ip, 'ipv4_mapped', None) or ip
+        if not ip.is_global or ip.is_multicast:
+            raise ValueError(f'Endereço não permitido no PDF: {host} ({ip})')
+        addresses.append(str(ip))
+    if not addresses:
+        raise ValueError(f'Host não resolvido: {host}')
+    return addresses[0]
+
+
+def fetch_public_url(url):
+    """
+    GET de uma URL http(s) pública, para o WeasyPrint (logo_url vem do usuário: SSRF).
+    A conexão vai para o IP já validado (sem segunda resolução de DNS) e cada redirect
+    é validado de novo.
+    """
+    for _ in range(FETCH_MAX_REDIRECTS + 1):
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https') or not parts.hostname:
+            raise ValueError(f'URL não permitida no PDF: {url}')
+        port = parts.port or (443 if parts.scheme == 'https' else 80)
+        address = _public_address(parts.hostname, port)
+
+        if parts.scheme == 'https':
+            conn = http.client.HTTPSConnection(parts.hostname, port, timeout=FETCH_TIMEOUT,
+                                               context=ssl.create_default_context())
+        else:
+            conn = http.client.HTTPConnection(parts.hostname, port, timeout=FETCH_TIMEOUT)
+        # Host/SNI/certificado continuam pelo nome; o socket, pelo IP validado
+        conn._create_connection = lambda _addr, *args, **kwargs: socket.create_connection((address, port), *args, **kwargs)
+
+        try:
+            path = (parts.path or '/') + (f'?{parts.query}' if parts.query else '')
+            conn.request('GET', path, headers={'User-Agent': 'CineOrca-PDF'})
+            response = conn.getresponse()
+            if response.status in (301, 302, 303, 307, 308) and response.getheader('Location'):
+                url = urljoin(url, response.getheader('Location'))
+                continue
+            if response.status != 200:
+                raise ValueError(f'HTTP {response.status} ao buscar {url}')
+            data = response.read(FETCH_MAX_BYTES + 1)
+            if len(data) > FETCH_MAX_BYTES:
+                raise ValueError(f'Arquivo grande demais para o PDF: {url}')
+            mime_type = (response.getheader('Content-Type') or '').split(';')[0].strip() or None
+            return {'string': data, 'mime_type': mime_type, 'redirected_url': url}
+        finally:
+            conn.close()
+
+    raise ValueError(f'Redirecionamentos demais: {url}')
+
+
+def _plain(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def pdf_fingerprint(budget, items, config):
+    """
+    Hash do conteúdo do documento: orçamento, itens e marca do usuário.
+    Qualquer mudança gera outro endereço; o PDF antigo só sai do disco pelo LRU.
+    """
+    payload = {
+        'layout': PDF_LAYOUT_VERSION,
+        'budget': {f: _plain(getattr(budget, f)) for f in BUDGET_FIELDS},
+        'items': [{f: _plain(getattr(item, f)) for f in ITEM_FIELDS} for item in items],
+        'config': {f: _plain(getattr(config, f, None)) for f in BRANDING_FIELDS},
+    }
+    raw = json.dumps(payload, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def render_pdf(html, base_url=None):
+    try:
+        from weasyprint import HTML, default_url_fetcher
+    except (ImportError, OSError) as e:  # OSError: pacote instalado sem as libs nativas (Pango)
+        raise PdfUnavailable(str(e))
+
+    def fetcher(url, *args, **kwargs):
+        # logo_url vem do usuário: data: local, http(s) só para endereço público, o resto é recusado
+        if url.startswith('data:'):
+            return default_url_fetcher(url, *args, **kwargs)
+        return fetch_public_url(url)
+
+    return HTML(string=html, base_url=base_url, url_fetcher=fetcher).write_pdf()
+
+
+class PdfStore:
+    """
+    Cache de PDFs em disco, endereçado pelo hash do conteúdo (<sha256>.pdf).
+    Leitura atualiza o mtime; escrita é atômica (tmp + rename) e, se o diretório
+    passar de PDF_CACHE_MAX_BYTES, os arquivos menos usados recentemente são removidos.
+    Vários workers podem dividir o mesmo diretório.
+    """
+
+    def __init__(self):
+        self.directory = None
+        self.max_bytes = 200 * 1024 * 1024
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+    def init_app(self, app):
+        self.directory = app.config.get('PDF_CACHE_DIR') or os.path.join(app.instance_path, 'pdf-cache')
+        self.max_bytes = app.config.get('PDF_CACHE_MAX_BYTES', self.max_bytes)
+        app.extensions['pdf_store'] = self
+
+    def _path(self, digest):
+        return os.path.join(self.directory, f'{digest}.pdf')
+
+    def get(self, digest):
+        path = self._path(digest)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return path
+
+    def put(self, digest, data):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(digest)
+        tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+        self.prune(keep=path)
+        return path
+
+    def prune(self, keep=None):
+        """Remove os PDFs mais antigos (mtime) até o diretório caber no limite (exceto `keep`)."""
+        entries = []
+        total = 0
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if not entry.name.endswith('.pdf'):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+
+        if total <= self.max_bytes:
+            return 0
+
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+
+        with self._lock:
+            self.evicted += removed
+        return removed
+
+    def counters(self):
+        return {'hits': self.hits, 'misses': self.misses, 'evicted': self.evicted}
+
+
+pdf_store = PdfStore()
@@ -0,0 +1,106 @@
+"""
+Política do pool de conexões (no lugar do pool_pre_ping).
+
+O pool_pre_ping faz um SELECT 1 a cada checkout, ou seja, uma ida e volta extra ao banco
+em todo request. Aqui a conexão só é testada se ficou parada no pool mais que
+POOL_PING_IDLE_SECONDS (é aí que o Neon/pgbouncer costuma derrubá-la); conexão que falha no
+teste é descartada e o pool entrega outra. Se mesmo assim o SELECT que abre uma transação
+cair por desconexão (e a sessão não tiver nada pendente), a RoutingSession (app/replica.py)
+refaz a query uma vez em conexão nova.
+
+PGBOUNCER=True (pgbouncer em transaction pooling): a engine assíncrona (asyncpg) deixa de
+reaproveitar prepared statements nomeados entre transações. O psycopg2 não usa prepared
+statements no servidor, então a engine síncrona não muda.
+"""
+import time
+import uuid
+
+from sqlalchemy import event, exc
+
+
+class PoolPolicy:
+    """Teste de conexão só após ociosidade, ajustes para pgbouncer e contadores do pool."""
+
+    def __init__(self):
+        self.idle_seconds = 30.0
+        self.pings = 0
+        self.stale = 0
+        self.retries = 0
+        self.connects = 0
+        self.invalidated = 0
+
+    def init_app(self, app, db=None):
+        # Antes do async_reads.init_app: ajusta ASYNC_ENGINE_OPTIONS para o pgbouncer
+        self.idle_seconds = app.config.get('POOL_PING_IDLE_SECONDS', self.idle_seconds)
+        app.extensions['pool_policy'] = self
+
+        if app.config.get('PGBOUNCER'):
+            options = dict(app.config.get('ASYNC_ENGINE_OPTIONS') or {})
+            connect_args = dict(options.get('connect_args') or {})
+            connect_args.setdefault('statement_cache_size', 0)
+            connect_args.setdefault('prepared_statement_cache_size', 0)
+            # Nome único: outra transação pode cair no mesmo backend do pgbouncer
+            connect_args.setdefault('prepared_statement_name_func', lambda: f'__asyncpg_{uuid.uuid4()}__')
+            options['connect_args'] = connect_args
+            app.config['ASYNC_ENGINE_OPTIONS'] = options
+
+        if db is not None:
+            with app.app_context():
+                for engine in db.engines.values():
+                    self.watch(engine.pool)
+
+    def watch(self, pool):
+        event.listen(pool, 'connect', self._connected)
+        event.listen(pool, 'checkin', self._checked_in)
+        event.listen(pool, 'checkout', self._checked_out)
+        event.listen(pool, 'invalidate', self._invalidated)
+
+    # --- Eventos do pool ----------------------------------------------------------------
+
+    def _connected(self, dbapi_connection, record):
+        self.connects += 1
+        record.info.pop('checked_in_at', None)
+
+    def _checked_in(self, dbapi_connection, record):
+        if record is not None:
+            record.info['checked_in_at'] = time.monotonic()
+
+    def _checked_out(self, dbapi_connection, record, proxy):
+        # Conexão recém-aberta (nunca devolvida) não precisa de teste
+        checked_in_at = record.info.get('checked_in_at')
+        if checked_in_at is None or time.monotonic() - checked_in_at < self.idle_seconds:
+            return
+
+        self.pings += 1
+        try:
+            cursor = dbapi_connection.cursor()
+            try:
+                cursor.execute('SELECT 1')
+            finally:
+                cursor.close()
+        except Exception:
+            # DisconnectionError no checkout: o pool descarta esta conexão e tenta outra
+            self.stale += 1
+            raise exc.DisconnectionError()
+
+    def _invalidated(self, dbapi_connection, record, exception):
+        self.invalidated += 1
+
+    # --- Retry na sessão ------------------------------------------------------------------
+
+    def should_retry(self, error, retryable):
+        """
+        retryable: o chamador garante que repetir não perde trabalho (SELECT abrindo a
+        transação, sessão sem pendências). Aí só falta a conexão ter caído de fato.
+        """
+        if not retryable or not getattr(error, 'connection_invalidated', False):
+            return False
+        self.retries += 1
+        return True
+
+    def counters(self):
+        return {'pings': self.pings, 'stale': self.stale, 'retries': self.retries,
+                'connects': self.connects, 'invalidated': self.invalidated}
+
+
+pool_policy = PoolPolicy()
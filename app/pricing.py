@@ -0,0 +1,125 @@
+from decimal import Decimal
+
+from sqlalchemy import select, func, update
+
+from app import db
+from app.models import Budget, BudgetItem
+from app.money import Money, ZERO
+from app.rollup import apply_deltas, mark_touched
+
+HOURS_PER_DAY = Decimal('8.00')
+MIN_DIVISOR = Decimal('0.01')
+
+
+def _dec(value):
+    if value is None:
+        return Decimal('0.00')
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+
+def items_cost(items):
+    """Soma de valor x dias de uma lista de itens (dicts com 'value' e 'days')."""
+    return sum((_dec(item['value']) * _dec(item['days']) for item in items), Decimal('0.00'))
+
+
+def _price(items_total, labor_days, daily_rate, extra_cost, margin_percent, tax_percent):
+    total_cost = _dec(labor_days) * daily_rate + _dec(extra_cost) + _dec(items_total)
+
+    divisor = Decimal(1) - (Decimal(margin_percent or 0) / Decimal(100) + _dec(tax_percent) / Decimal(100))
+    final_price = total_cost / divisor if divisor > MIN_DIVISOR else total_cost
+
+    return Money(total_cost), Money(final_price)
+
+
+def price_budget(items_total, labor_days, hourly_rate, extra_cost, margin_percent, tax_percent):
+    """
+    Custo total e preço final de um orçamento.
+    preço = custo / (1 - margem - imposto); se o divisor ficar <= 1%, o preço é o próprio custo.
+    """
+    daily_rate = _dec(hourly_rate) * HOURS_PER_DAY
+    return _price(items_total, labor_days, daily_rate, extra_cost, margin_percent, tax_percent)
+
+
+def price_batch(rows, hourly_rate):
+    """
+    Precifica um lote linha a linha: laço em Decimal com a mesma conta do price_budget, não aritmética
+    por coluna. O ganho do lote está no SQL (uma leitura e um UPDATE por bloco); aqui só a
+    diária é calculada uma vez para todas as linhas.
+    Cada linha: dict com id, items_total, labor_days, extra_cost, margin_percent, tax_percent.
+    Retorna [(id, total_cost, final_price)].
+    """
+    daily_rate = _dec(hourly_rate) * HOURS_PER_DAY
+    return [
+        (row['id'], *_price(row['items_total'], row['labor_days'], daily_rate,
+                            row['extra_cost'], row['margin_percent'], row['tax_percent']))
+        for row in rows
+    ]
+
+
+def _pending_chunk(user_id, after_id, chunk_size):
+    # Subquery correlacionada: soma só os itens de cada orçamento do lote (índice em budget_id
+    # e, no Postgres particionado, só a partição do ano via budget_date), não a tabela inteira
+    items_total = select(
+        func.coalesce(func.sum(BudgetItem.value * BudgetItem.days), 0)
+    ).where(
+        BudgetItem.budget_id == Budget.id,
+        BudgetItem.budget_date == Budget.date
+    ).correlate(Budget).scalar_subquery()
+
+    stmt = select(
+        Budget.id, Budget.date, Budget.labor_days, Budget.extra_cost, Budget.margin_percent,
+        Budget.tax_percent, Budget.total_cost, Budget.final_price, Budget.version,
+        items_total.label('items_total')
+    ).where(
+        Budget.user_id == user_id,
+        Budget.status == 'Pendente',
+        Budget.id > after_id
+    ).order_by(Budget.id).limit(chunk_size).with_for_update(of=Budget)
+
+    return [row._asdict() for row in db.session.execute(stmt)]
+
+
+def reprice_pending_budgets(user_id, hourly_rate, chunk_size=500, progress=None):
+    """
+    Recalcula total_cost/final_price de todos os orçamentos pendentes do usuário.
+    Trabalha em lotes por id, com um commit por lote para não segurar locks longos.
+    O rollup mensal recebe os deltas na mesma transação de cada lote.
+    progress(updated), se informado, é chamado depois de cada lote (jobs em segundo plano).
+    """
+    updated = 0
+    after_id = 0
+
+    while True:
+        rows = _pending_chunk(user_id, after_id, chunk_size)
+        if not rows:
+            break
+        after_id = rows[-1]['id']
+
+        by_id = {row['id']: row for row in rows}
+        changes, deltas = [], {}
+        for budget_id, total_cost, final_price in price_batch(rows, hourly_rate):
+            row = by_id[budget_id]
+            old_price = Money(row['final_price'])
+            if total_cost == Money(row['total_cost']) and final_price == old_price:
+                continue
+            changes.append({'id': budget_id, 'total_cost': total_cost, 'final_price': final_price,
+                            'version': row['version'] + 1})
+            if row['date'] is not None:
+                key = (user_id, row['date'].year, row['date'].month, 'Pendente')
+                deltas.setdefault(key, [ZERO, 0])[0] += final_price - old_price
+
+        if changes:
+            # UPDATE em lote por chave primária (executemany)
+            db.session.execute(update(Budget), changes)
+            apply_deltas(db.session.connection(), deltas)
+            mark_touched(db.session, {(k[0], k[1]) for k in deltas})
+            updated += len(changes)
+
+        db.session.commit()
+        if progress is not None:
+            progress(updated)
+
+        if len(rows) < chunk_size:
+            break
+
+    return updated
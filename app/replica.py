@@ -0,0 +1,187 @@
+"""
+Réplica de leitura opcional (REPLICA_DATABASE_URI).
+
+Views marcadas com @replica_reads mandam os SELECTs para a réplica em GET/HEAD; todo o
+resto vai para o primário:
+- escrita (INSERT/UPDATE/DELETE, flush) e qualquer leitura depois dela na mesma sessão;
+- statements que não são select() (text(), db.session.connection());
+- read-your-own-writes: depois de um commit, o navegador fica preso ao primário por
+  REPLICA_STICKY_SECONDS (marca na sessão do Flask), então o redirect pós-POST já vê o dado;
+- atraso da réplica acima de REPLICA_MAX_LAG_SECONDS, ou réplica fora do ar.
+
+Local: REPLICA_DATABASE_URI=sqlite:///replica.db e 'flask sync-replica' copia o primário.
+"""
+import logging
+import sqlite3
+import threading
+import time
+from functools import wraps
+
+from flask import g, has_request_context, request, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, exc, text
+from sqlalchemy.orm import Session as OrmSession
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.dml import UpdateBase
+
+from app.pooling import pool_policy
+
+logger = logging.getLogger('app.replica')
+
+REPLICA_BIND = 'replica'
+
+# Em standby: 0 se já aplicou tudo que recebeu (primário ocioso não conta como atraso)
+PG_LAG_QUERY = text(
+    'SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 '
+    'ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END'
+)
+
+
+def replica_reads(view):
+    """Permite que os SELECTs desta view (em GET/HEAD) sejam servidos pela réplica."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if request.method in ('GET', 'HEAD'):
+            g._replica_reads = True
+        return view(*args, **kwargs)
+    return wrapper
+
+
+class ReplicaRouter:
+    """Decide o destino de cada statement e guarda o último atraso medido (por processo)."""
+
+    def __init__(self):
+        self.enabled = False
+        self.max_lag = 5.0
+        self.sticky_seconds = 10
+        self.lag_check_seconds = 5
+        self._lag = 0.0
+        self._lag_checked_at = None
+        self._lock = threading.Lock()
+        self.replica_reads = 0
+        self.primary_reads = 0
+        self.lag_fallbacks = 0
+
+    def init_app(self, app):
+        # Precisa vir antes do db.init_app: a réplica entra como bind 'replica'
+        uri = app.config.get('REPLICA_DATABASE_URI')
+        self.enabled = bool(uri)
+        self.max_lag = app.config.get('REPLICA_MAX_LAG_SECONDS', self.max_lag)
+        self.sticky_seconds = app.config.get('REPLICA_STICKY_SECONDS', self.sticky_seconds)
+        self.lag_check_seconds = app.config.get('REPLICA_LAG_CHECK_SECONDS', self.lag_check_seconds)
+        app.extensions['replica_router'] = self
+        if not self.enabled:
+            return
+
+        binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+        binds.setdefault(REPLICA_BIND, uri)
+        app.config['SQLALCHEMY_BINDS'] = binds
+        app.after_request(self._pin_after_write)
+
+    # --- Decisão por statement ------------------------------------------------------
+
+    def use_replica(self, orm_session, clause):
+        if not self.enabled or not has_request_context() or not g.get('_replica_reads'):
+            return False
+        if not isinstance(clause, Select) or orm_session._flushing or orm_session.info.get('_wrote'):
+            return False
+        if g.get('_replica_wrote'):
+            return False
+        if session.get('_primary_until', 0) > time.time():
+            self.primary_reads += 1
+            return False
+        if self.replica_lag(orm_session._db.engines[REPLICA_BIND]) > self.max_lag:
+            self.lag_fallbacks += 1
+            return False
+        self.replica_reads += 1
+        return True
+
+    def replica_lag(self, engine):
+        """Atraso da réplica em segundos, medido no máximo a cada REPLICA_LAG_CHECK_SECONDS."""
+        now = time.monotonic()
+        if self._lag_checked_at is not None and now - self._lag_checked_at < self.lag_check_seconds:
+            return self._lag
+        with self._lock:
+            if self._lag_checked_at is None or now - self._lag_checked_at >= self.lag_check_seconds:
+                self._lag = self._measure_lag(engine)
+                self._lag_checked_at = now
+        return self._lag
+
+    def _measure_lag(self, engine):
+        try:
+            with engine.connect() as conn:
+                if conn.dialect.name == 'postgresql':
+                    return float(conn.execute(PG_LAG_QUERY).scalar() or 0)
+                # SQLite (dev): cópia feita pelo 'flask sync-replica', sem replicação contínua
+                conn.execute(text('SELECT 1'))
+                return 0.0
+        except Exception as e:
+            logger.warning(f'Réplica indisponível ({e}); leituras no primário.')
+            return float('inf')
+
+    # --- Read-your-own-writes -----------------------------------------------------------
+
+    def _pin_after_write(self, response):
+        if g.get('_replica_wrote'):
+            session['_primary_until'] = time.time() + self.sticky_seconds
+        return response
+
+    def counters(self):
+        return {'replica': self.replica_reads, 'primary_pinned': self.primary_reads,
+                'primary_lag': self.lag_fallbacks, 'lag_seconds': self._lag}
+
+
+replica_router = ReplicaRouter()
+
+
+class RoutingSession(Session):
+    """
+    Session do Flask-SQLAlchemy que escolhe primário ou réplica por statement e repete
+    uma vez a primeira query da transação se a conexão tiver caído (app/pooling.py).
+    """
+
+    def execute(self, statement, *args, **kwargs):
+        # Só um SELECT abrindo a transação, sem nada pendente na sessão: o rollback antes do
+        # retry descartaria objetos novos/alterados (o autoflush roda dentro do execute)
+        retryable = (isinstance(statement, Select) and not self.in_transaction()
+                     and not (self.new or self.dirty or self.deleted))
+        try:
+            return super().execute(statement, *args, **kwargs)
+        except exc.DBAPIError as e:
+            if not pool_policy.should_retry(e, retryable):
+                raise
+            self.rollback()
+            return super().execute(statement, *args, **kwargs)
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if isinstance(clause, UpdateBase):
+            # INSERT/UPDATE/DELETE direto (Core) não passa pelo after_flush
+            self.info['_wrote'] = True
+        elif bind is None and replica_router.use_replica(self, clause):
+            return self._db.engines[REPLICA_BIND]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(OrmSession, 'after_flush')
+def _mark_write(session_, flush_context):
+    # Depois de escrever, a sessão só lê do primário (a réplica ainda não tem o dado)
+    session_.info['_wrote'] = True
+
+
+@event.listens_for(OrmSession, 'after_commit')
+def _mark_commit(session_):
+    if session_.info.pop('_wrote', False) and has_request_context():
+        g._replica_wrote = True
+
+
+def sync_sqlite_replica(primary_engine, replica_engine):
+    """Dev: copia o arquivo SQLite do primário para o da réplica (backup online do sqlite3)."""
+    if primary_engine.dialect.name != 'sqlite' or replica_engine.dialect.name != 'sqlite':
+        raise RuntimeError('sync-replica é só para SQLite; no Postgres a réplica é física (streaming).')
+    source = sqlite3.connect(primary_engine.url.database)
+    target = sqlite3.connect(replica_engine.url.database)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
@@ -0,0 +1,185 @@
+from collections import defaultdict
+
+from sqlalchemy import event, inspect, func, select, delete
+from sqlalchemy.orm import Session
+
+from app import db
+from app.models import Budget, BudgetMonthlyRollup
+from app.money import Money, ZERO
+
+STATUSES = ('Aprovado', 'Pendente', 'Perdido')
+
+# Colunas do Budget que mudam a chave ou o valor do agregado
+_TRACKED = ('user_id', 'date', 'status', 'final_price')
+
+
+def _old_value(obj, attr):
+    # Valor que estava no banco antes deste flush
+    hist = inspect(obj).attrs[attr].history
+    if hist.deleted:
+        return hist.deleted[0]
+    return getattr(obj, attr)
+
+
+def _key(user_id, date, status):
+    if user_id is None or date is None:
+        return None
+    return (user_id, date.year, date.month, status or 'Pendente')
+
+
+def collect_deltas(session):
+    """Calcula a variação (total, quantidade) por chave do rollup para o flush atual."""
+    deltas = defaultdict(lambda: [ZERO, 0])
+
+    def add(key, value, count):
+        if key is None:
+            return
+        # Money: mesma escala do Numeric(12, 2), o delta bate com o que o banco guarda
+        deltas[key][0] += Money(value)
+        deltas[key][1] += count
+
+    for obj in session.new:
+        if isinstance(obj, Budget):
+            add(_key(obj.user_id, obj.date, obj.status), obj.final_price, 1)
+
+    for obj in session.deleted:
+        if isinstance(obj, Budget):
+            old = {attr: _old_value(obj, attr) for attr in _TRACKED}
+            add(_key(old['user_id'], old['date'], old['status']), -Money(old['final_price']), -1)
+
+    for obj in session.dirty:
+        if not isinstance(obj, Budget) or obj in session.deleted:
+            continue
+        state = inspect(obj)
+        if not any(state.attrs[attr].history.has_changes() for attr in _TRACKED):
+            continue
+        old = {attr: _old_value(obj, attr) for attr in _TRACKED}
+        add(_key(old['user_id'], old['date'], old['status']), -Money(old['final_price']), -1)
+        add(_key(obj.user_id, obj.date, obj.status), obj.final_price, 1)
+
+    return {k: v for k, v in deltas.items() if v[0] != 0 or v[1] != 0}
+
+
+def apply_deltas(connection, deltas):
+    """Upsert atômico (total = total + delta), seguro com requests concorrentes."""
+    if not deltas:
+        return
+
+    table = BudgetMonthlyRollup.__table__
+    rows = [
+        {'user_id': k[0], 'year': k[1], 'month': k[2], 'status': k[3], 'total': v[0], 'count': v[1]}
+        for k, v in deltas.items()
+    ]
+
+    dialect = connection.dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+
+        stmt = insert(table).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.user_id, table.c.year, table.c.month, table.c.status],
+            set_={
+                'total': table.c.total + stmt.excluded.total,
+                'count': table.c.count + stmt.excluded.count,
+            }
+        )
+        connection.execute(stmt)
+        return
+
+    # Fallback genérico: UPDATE e, se não havia linha, INSERT
+    for row in rows:
+        result = connection.execute(
+            table.update()
+            .where(table.c.user_id == row['user_id'], table.c.year == row['year'],
+                   table.c.month == row['month'], table.c.status == row['status'])
+            .values(total=table.c.total + row['total'], count=table.c.count + row['count'])
+        )
+        if result.rowcount == 0:
+            connection.execute(table.insert().values(**row))
+
+
+def mark_touched(session, pairs):
+    # (user_id, year) alterados nesta transação; app/stats.py invalida o cache no commit
+    session.info.setdefault('rollup_touched', set()).update(pairs)
+
+
+@event.listens_for(Session, 'after_flush')
+def _maintain_rollup(session, flush_context):
+    # Roda na mesma transação do flush: se o commit falhar, o rollup volta junto.
+    deltas = collect_deltas(session)
+    apply_deltas(session.connection(), deltas)
+    mark_touched(session, {(k[0], k[1]) for k in deltas})
+
+
+def rebuild_rollup(user_id=None):
+    """Recalcula o rollup a partir da tabela 'budget' (backfill / correção de drift)."""
+    table = BudgetMonthlyRollup.__table__
+    year_col = db.cast(db.extract('year', Budget.date), db.Integer)
+    month_col = db.cast(db.extract('month', Budget.date), db.Integer)
+
+    source = select(
+        Budget.user_id,
+        year_col,
+        month_col,
+        func.coalesce(Budget.status, 'Pendente'),
+        func.coalesce(func.sum(Budget.final_price), 0),
+        func.count(Budget.id),
+    ).where(Budget.date.isnot(None))
+
+    clear = delete(table)
+    if user_id is not None:
+        source = source.where(Budget.user_id == user_id)
+        clear = clear.where(table.c.user_id == user_id)
+
+    source = source.group_by(Budget.user_id, year_col, month_col, func.coalesce(Budget.status, 'Pendente'))
+
+    touched = select(table.c.user_id, table.c.year).distinct()
+    if user_id is not None:
+        touched = touched.where(table.c.user_id == user_id)
+
+    before = set(db.session.execute(touched).all())
+    db.session.execute(clear)
+    db.session.execute(
+        table.insert().from_select(['user_id', 'year', 'month', 'status', 'total', 'count'], source)
+    )
+    after = set(db.session.execute(touched).all())
+
+    mark_touched(db.session, {tuple(row) for row in before | after})
+    db.session.commit()
+
+
+def dashboard_totals_statement(user_id, year):
+    return select(
+        BudgetMonthlyRollup.month, BudgetMonthlyRollup.status,
+        BudgetMonthlyRollup.total, BudgetMonthlyRollup.count
+    ).where(
+        BudgetMonthlyRollup.user_id == user_id,
+        BudgetMonthlyRollup.year == year
+    )
+
+
+def summarize_dashboard_rows(rows, month):
+    """(month, status, total, count) do ano -> (totais do mês por status, faturamento por mês, nº do mês)."""
+    totals = {status: ZERO for status in STATUSES}
+    revenue = [ZERO] * 12
+    month_count = 0
+
+    for m, status, total, count in rows:
+        total = Money(total)
+        if m == month:
+            month_count += count
+            if status in totals:
+                totals[status] += total
+        if status == 'Aprovado':
+            revenue[m - 1] += total
+
+    return totals, revenue, month_count
+
+
+def get_dashboard_totals(user_id, year, month):
+    """Totais do mês por status, faturamento aprovado mês a mês e nº de orçamentos do mês, numa única query."""
+    rows = db.session.execute(dashboard_totals_statement(user_id, year)).all()
+    return summarize_dashboard_rows(rows, month)
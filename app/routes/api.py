@@ -0,0 +1,120 @@
+import json
+from datetime import datetime, timedelta
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context, abort
+from flask_login import login_required, current_user
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+
+from app import db
+from app.models import Budget
+from app.search import search_budgets
+from app.analytics import GRANULARITIES, bucket_count, revenue_analytics
+from app.replica import replica_reads
+
+api_bp = Blueprint('api', __name__)
+
+STREAM_CHUNK = 500
+
+def parse_day(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d') if value else None
+    except ValueError:
+        abort(400, description=f'Data inválida: {value} (use AAAA-MM-DD)')
+
+def filtered_budgets():
+    # Filtros: ?start=AAAA-MM-DD&end=AAAA-MM-DD&status=Aprovado (intervalo [start, end] inclusivo)
+    query = select(Budget).where(Budget.user_id == current_user.id)
+
+    start = parse_day(request.args.get('start'))
+    end = parse_day(request.args.get('end'))
+    status = request.args.get('status')
+
+    if start:
+        query = query.where(Budget.date >= start)
+    if end:
+        query = query.where(Budget.date < end + timedelta(days=1))
+    if status:
+        query = query.where(Budget.status == status)
+
+    return query
+
+@api_bp.route('/budgets', methods=['GET'])
+@login_required
+@replica_reads
+def list_budgets():
+    """
+    Lista em streaming: NDJSON por padrão, array JSON com ?format=json.
+    Cursor no servidor (yield_per) e itens carregados em lote por chunk (selectinload),
+    então a memória fica limitada ao tamanho do chunk.
+    """
+    query = filtered_budgets().options(selectinload(Budget.items)) \
+        .order_by(Budget.date, Budget.id) \
+        .execution_options(yield_per=STREAM_CHUNK)
+
+    as_array = request.args.get('format') == 'json'
+
+    def generate():
+        first = True
+        if as_array:
+            yield '['
+        for budget in db.session.scalars(query):
+            line = json.dumps(budget.to_dict(), ensure_ascii=False)
+            if as_array:
+                yield line if first else ',' + line
+            else:
+                yield line + '\n'
+            first = False
+        if as_array:
+            yield ']'
+
+    mimetype = 'application/json' if as_array else 'application/x-ndjson'
+    return Response(stream_with_context(generate()), mimetype=mimetype)
+
+@api_bp.route('/budgets/<int:id>', methods=['GET'])
+@login_required
+@replica_reads
+def get_budget(id):
+    # Busca segura (Anti-IDOR)
+    budget = Budget.query.options(selectinload(Budget.items)) \
+        .filter_by(id=id, user_id=current_user.id).first_or_404()
+    return jsonify(budget.to_dict())
+
+@api_bp.route('/search', methods=['GET'])
+@login_required
+@replica_reads
+def search_budgets_api():
+    # ?q=termos&page=N&per_page=M; ordenado por relevância, sem os itens
+    per_page = min(max(request.args.get('per_page', 20, type=int), 1), 100)
+    page = request.args.get('page', 1, type=int)
+    results = search_budgets(current_user.id, request.args.get('q', ''), page=page, per_page=per_page)
+    return jsonify({
+        'results': [budget.to_dict(include_items=False) for budget in results.items],
+        'page': results.page,
+        'has_next': results.has_next,
+    })
+
+@api_bp.route('/analytics', methods=['GET'])
+@login_required
+@replica_reads
+def revenue_analytics_api():
+    """
+    Faturamento por balde: ?start=AAAA-MM-DD&end=AAAA-MM-DD (inclusivos)&granularity=day|week|month|quarter|year.
+    Sem datas: do início do ano até hoje, por mês.
+    """
+    today = datetime.now().date()
+    start = parse_day(request.args.get('start'))
+    end = parse_day(request.args.get('end'))
+    start = start.date() if start else today.replace(month=1, day=1)
+    end = end.date() if end else today
+    granularity = request.args.get('granularity', 'month')
+
+    if granularity not in GRANULARITIES:
+        abort(400, description=f'Granularidade inválida (use {", ".join(GRANULARITIES)}).')
+    if end < start:
+        abort(400, description='Intervalo inválido: end antes de start.')
+
+    max_buckets = current_app.config.get('ANALYTICS_MAX_BUCKETS', 400)
+    if bucket_count(start, end, granularity) > max_buckets:
+        abort(400, description=f'Intervalo longo demais para {granularity} (máximo de {max_buckets} pontos).')
+
+    return jsonify(revenue_analytics.get(current_user.id, start, end, granularity, today=today))
@@ -1,10 +1,10 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app
 from flask_login import login_user, login_required, logout_user, current_user
-from werkzeug.security import generate_password_hash, check_password_hash
 
 # CORREÇÃO 1: Ajuste dos imports para apontar para o pacote 'app'
 from app import db
 from app.models import User, UserConfig
+from app.passwords import password_hasher, HashingBusy
 
 # CORREÇÃO 2: Renomear 'bp' para 'auth_bp' para facilitar o import no __init__.py
 auth_bp = Blueprint('auth', __name__)
@@ -28,7 +28,21 @@ def login():
 
         user = User.query.filter_by(email=email).first()
 
-        if user and check_password_hash(user.password, password):
+        try:
+            valid = bool(user) and password_hasher.verify(user.password, password)
+        except HashingBusy:
+            flash('Muitos acessos ao mesmo tempo. Tente novamente em alguns segundos.', 'error')
+            return render_template('login.html'), 503
+
+        if valid:
+            # Parâmetros do hash mudaram (ex.: mais iterações): atualiza com a senha em mãos
+            if password_hasher.needs_rehash(user.password):
+                try:
+                    user.password = password_hasher.hash(password)
+                    db.session.commit()
+                except HashingBusy:
+                    pass # Fica para o próximo login
+
             login_user(user)
             current_app.logger.info(f'Login realizado: {email}')
 
@@ -59,11 +73,17 @@ def register():
             flash('Email já cadastrado.', 'error')
             return redirect(url_for('auth.register'))
 
+        try:
+            pwhash = password_hasher.hash(password)
+        except HashingBusy:
+            flash('Muitos acessos ao mesmo tempo. Tente novamente em alguns segundos.', 'error')
+            return redirect(url_for('auth.register'))
+
         # Criar Usuário
         new_user = User(
             email=email, 
             name=name, 
-            password=generate_password_hash(password, method='pbkdf2:sha256')
+            password=pwhash
         )
 
         db.session.add(new_user)
@@ -1,11 +1,16 @@
 import json
 from decimal import Decimal
-from flask import Blueprint, render_template, request, redirect, url_for, flash
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, Response, abort, send_file
 from flask_login import login_required, current_user
+from sqlalchemy import select, insert, update, delete
 
 from app import db
-from app.models import Budget, BudgetItem, Client, Freelancer, Equipment
+from app.models import Budget, BudgetItem
 from app.utils import safe_decimal
+from app.pricing import price_budget, items_cost
+from app.catalog import get_catalog, catalog_etag
+from app.pdf import pdf_store, pdf_fingerprint, render_pdf, PdfUnavailable
+from app.replica import replica_reads
 
 def safe_int(value, default=0):
     try:
@@ -15,6 +20,27 @@ def safe_int(value, default=0):
 
 budget_bp = Blueprint('budget', __name__)
 
+def parse_items_json(raw):
+    """items_json do formulário -> itens limpos para sync_budget_items. ValueError se não for uma lista."""
+    items_data_json = json.loads(raw or '[]')
+    if not isinstance(items_data_json, list):
+        raise ValueError('items_json deve ser uma lista')
+
+    submitted_items = []
+
+    for item in items_data_json:
+        days = safe_decimal(item.get('days', 1))
+        val = safe_decimal(item.get('value', 0))
+        name = str(item.get('name', 'Item')).strip()[:100] # Slicing aqui também
+        item_type = str(item.get('type', 'Outro'))[:20]
+
+        submitted_items.append({
+            'id': safe_int(item.get('id'), None),
+            'name': name, 'item_type': item_type, 'value': val, 'days': days
+        })
+
+    return submitted_items
+
 @budget_bp.route('/orcamento/novo', methods=['GET', 'POST'])
 @login_required
 def new_budget(): 
@@ -54,8 +80,6 @@ def handle_budget_form(budget):
         else:
             budget.client = client_name
             budget.title = title
-            for item in budget.items: 
-                db.session.delete(item)
 
         # --- BLINDAGEM 2: Mais Slicing para proteger o banco ---
         budget.client_cnpj = request.form.get('client_cnpj', '')[:20]
@@ -75,51 +99,21 @@ def handle_budget_form(budget):
         budget.labor_days = safe_decimal(request.form.get('labor_days'))
 
         try:
-            items_json_str = request.form.get('items_json', '[]')
-            if not items_json_str: items_json_str = '[]'
-            items_data_json = json.loads(items_json_str)
-            if not isinstance(items_data_json, list): raise ValueError
-        except:
+            submitted_items = parse_items_json(request.form.get('items_json', '[]'))
+        except (ValueError, TypeError, AttributeError):
             db.session.rollback()
             flash("Erro ao processar itens do orçamento.", "error")
             return redirect(url_for('dashboard.dashboard'))
 
-        items_cost_sum = Decimal('0.00')
-
-        for item in items_data_json:
-            days = safe_decimal(item.get('days', 1))
-            val = safe_decimal(item.get('value', 0))
-            name = str(item.get('name', 'Item')).strip()[:100] # Slicing aqui também
-            item_type = str(item.get('type', 'Outro'))[:20]
+        sync_budget_items(budget.id, budget.date, submitted_items)
 
-            new_item = BudgetItem(
-                budget_id=budget.id, name=name, value=val, item_type=item_type, days=days 
-            )
-            db.session.add(new_item)
-            items_cost_sum += (val * days)
+        budget.extra_cost = safe_decimal(request.form.get('extra_cost_input'))
 
-        hourly_rate = safe_decimal(config.hourly_rate) if config.hourly_rate else safe_decimal('0.00')
-        daily_rate = hourly_rate * safe_decimal('8.00')
-
-        labor_days_dec = safe_decimal(request.form.get('labor_days'))
-        budget.labor_days = labor_days_dec
-        labor_cost = labor_days_dec * daily_rate
-
-        extra_cost = safe_decimal(request.form.get('extra_cost_input'))
-        budget.extra_cost = extra_cost
-
-        total_cost = labor_cost + extra_cost + items_cost_sum
-        budget.total_cost = total_cost
-
-        margin_dec = Decimal(budget.margin_percent) / Decimal(100)
-        tax_dec = budget.tax_percent / Decimal(100)
-        markup_factor = margin_dec + tax_dec
-        divisor = Decimal(1) - markup_factor
-
-        if divisor > Decimal('0.01'):
-            budget.final_price = total_cost / divisor
-        else:
-            budget.final_price = total_cost 
+        # Cálculo centralizado em app/pricing.py (o mesmo usado no re-preço em lote)
+        budget.total_cost, budget.final_price = price_budget(
+            items_cost(submitted_items), budget.labor_days, config.hourly_rate,
+            budget.extra_cost, budget.margin_percent, budget.tax_percent
+        )
 
         if not budget.status: budget.status = 'Pendente'
 
@@ -130,21 +124,113 @@ def handle_budget_form(budget):
     if budget and budget.items:
         items_data = [item.to_dict() for item in budget.items]
 
+    # Catálogo cacheado pela versão: sem queries de catálogo enquanto nada mudar
+    catalog = get_catalog(current_user.id, config.catalog_version)
+
     return render_template('budget_form.html', 
                            config=config, 
-                           gears=Equipment.query.filter_by(user_id=current_user.id).all(), 
-                           freelas=Freelancer.query.filter_by(user_id=current_user.id).all(), 
-                           # Filtra apenas clientes ativos
-                           clients=Client.query.filter_by(user_id=current_user.id, active=True).all(), 
+                           gears=catalog['gears'], 
+                           freelas=catalog['freelas'], 
                            budget=budget,
                            items_data=items_data) 
 
+def catalog_json_response(concurrent=False):
+    config = getattr(current_user, 'config', None)
+    if not config:
+        return jsonify({'gears': [], 'freelas': []})
+
+    # ETag = versão do catálogo: 304 sem tocar no catálogo se o navegador já tem a cópia atual
+    etag = catalog_etag(current_user.id, config.catalog_version)
+    if etag in request.if_none_match:
+        return Response(status=304, headers={'ETag': f'"{etag}"', 'Cache-Control': 'private, no-cache'})
+
+    response = jsonify(get_catalog(current_user.id, config.catalog_version, concurrent=concurrent))
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+@budget_bp.route('/catalogo.json', methods=['GET'])
+@login_required
+def catalog_json():
+    return catalog_json_response()
+
+def sync_budget_items(budget_id, budget_date, submitted_items):
+    """
+    Persiste os itens por diff contra o que está no banco: UPDATE só do que mudou,
+    INSERT multi-row do que é novo e um único DELETE ... IN para os removidos.
+    Editar um item custa poucos statements, não 2N.
+    budget_date (chave de partição) limita as queries à partição do ano do orçamento.
+    """
+    # Sem autoflush: o Budget ainda sujo do formulário iria num UPDATE extra (e version subiria duas vezes);
+    # ele é gravado uma vez só, no commit
+    with db.session.no_autoflush:
+        table = BudgetItem.__table__
+        stored = {
+            row.id: row for row in db.session.execute(
+                select(table.c.id, table.c.name, table.c.item_type, table.c.value, table.c.days)
+                .where(table.c.budget_id == budget_id, table.c.budget_date == budget_date)
+            )
+        }
+
+        to_insert, to_update, kept_ids = [], [], set()
+        for item in submitted_items:
+            # Só aceita id que pertence a este orçamento (ids de outros viram item novo)
+            old = stored.get(item['id'])
+            if old is None or item['id'] in kept_ids:
+                to_insert.append({'budget_id': budget_id, 'budget_date': budget_date, 'name': item['name'],
+                                  'item_type': item['item_type'], 'value': item['value'], 'days': item['days']})
+                continue
+
+            kept_ids.add(old.id)
+            if (old.name, old.item_type, old.value, old.days) != (item['name'], item['item_type'], item['value'], item['days']):
+                to_update.append({'id': old.id, 'name': item['name'], 'item_type': item['item_type'],
+                                  'value': item['value'], 'days': item['days']})
+
+        removed_ids = [item_id for item_id in stored if item_id not in kept_ids]
+
+        if removed_ids:
+            db.session.execute(delete(BudgetItem).where(BudgetItem.id.in_(removed_ids),
+                                                        BudgetItem.budget_date == budget_date))
+        if to_update:
+            # UPDATE em lote por chave primária (executemany)
+            db.session.execute(update(BudgetItem), to_update)
+        if to_insert:
+            db.session.execute(insert(table), to_insert)
+
 @budget_bp.route('/orcamento/print/<int:id>', methods=['GET'])
 @login_required
+@replica_reads
 def print_budget(id):
     budget = Budget.query.filter_by(id=id, user_id=current_user.id).first_or_404()
     return render_template('print_budget.html', budget=budget, config=current_user.config)
 
+@budget_bp.route('/orcamento/pdf/<int:id>', methods=['GET'])
+@login_required
+@replica_reads
+def budget_pdf(id):
+    """
+    PDF gerado no servidor. O arquivo é guardado pelo hash do conteúdo (orçamento + itens + marca),
+    então downloads repetidos saem direto do disco, sem renderizar de novo.
+    """
+    budget = Budget.query.filter_by(id=id, user_id=current_user.id).first_or_404()
+    items = BudgetItem.query.filter_by(budget_id=budget.id, budget_date=budget.date).order_by(BudgetItem.id).all()
+    config = current_user.config
+
+    digest = pdf_fingerprint(budget, items, config)
+    path = pdf_store.get(digest)
+    if path is None:
+        html = render_template('budget_pdf.html', budget=budget, items=items, config=config)
+        try:
+            data = render_pdf(html, base_url=request.url_root)
+        except PdfUnavailable:
+            abort(501, description='Geração de PDF indisponível (instale weasyprint e as libs Pango/HarfBuzz do sistema).')
+        path = pdf_store.put(digest, data)
+
+    response = send_file(path, mimetype='application/pdf', download_name=f'orcamento-{budget.id}.pdf',
+                         as_attachment=request.args.get('download') == '1', etag=digest, max_age=0)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
 @budget_bp.route('/status/<int:id>/<new_status>', methods=['POST'])
 @login_required
 def change_status(id, new_status):
@@ -2,14 +2,21 @@ import json
 import calendar
 from datetime import datetime
 from decimal import Decimal
-from flask import Blueprint, render_template, request, redirect, url_for, flash
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, abort, current_app
 from flask_login import login_required, current_user
-from sqlalchemy import func
 
 # IMPORTS CORRETOS
 from app import db
 from app.models import Budget, UserConfig
 from app.utils import safe_decimal
+from app.stats import dashboard_stats
+from app.fragments import row_fragments
+from app.money import Money
+from app.pagination import keyset_paginate
+from app.pricing import reprice_pending_budgets
+from app.jobs import job_queue, JobLimitExceeded, JobUnavailable
+from app.search import search_budgets, MAX_QUERY_LENGTH
+from app.replica import replica_reads
 
 # CRIAÇÃO DO BLUEPRINT
 dashboard_bp = Blueprint('dashboard', __name__)
@@ -20,22 +27,61 @@ def index():
     return redirect(url_for('dashboard.dashboard'))
 # ------------------------------------------------------
 
+def month_bounds(year, month):
+    # Tratamento de erro para calendário
+    last_day = calendar.monthrange(year, month)[1]
+    return datetime(year, month, 1), datetime(year, month, last_day, 23, 59, 59)
+
+def dashboard_period():
+    # ?year=&month=; fora da faixa volta para o mês atual
+    now = datetime.now()
+    month = request.args.get('month', now.month, type=int)
+    year = request.args.get('year', now.year, type=int)
+    if not 1 <= month <= 12 or not 2000 <= year <= now.year + 1:
+        return now.year, now.month
+    return year, month
+
+def render_dashboard(config, month, totals, yearly_revenue, month_count, pagination, page_endpoint='dashboard.dashboard', year=None):
+    # Tudo em Money/Decimal; no JSON dos gráficos vai como string exata ('1234.56')
+    total_approved = totals['Aprovado']
+    total_pending = totals['Pendente']
+    total_lost = totals['Perdido']
+
+    goal = Money(config.monthly_goal)
+    goal_percent = int(total_approved * 100 / goal) if goal > 0 else 0
+
+    revenue_data = [str(total) for total in yearly_revenue]
+
+    status_data = [str(total_approved), str(total_pending), str(total_lost)]
+
+    return render_template('dashboard.html', 
+                           budget_rows=row_fragments.render(pagination.items), 
+                           pagination=pagination, 
+                           page_endpoint=page_endpoint,
+                           config=config, 
+                           month=month, 
+                           year=year or datetime.now().year,
+                           current_year=datetime.now().year,
+                           month_count=month_count,
+                           total_approved=total_approved, 
+                           total_pending=total_pending, 
+                           total_lost=total_lost, 
+                           goal_percent=goal_percent,
+                           revenue_data=json.dumps(revenue_data), 
+                           status_data=json.dumps(status_data))
+
 @dashboard_bp.route('/dashboard')
 @login_required
+@replica_reads
 def dashboard():
     # Usa getattr para segurança caso config seja None
     config = getattr(current_user, 'config', None)
     if not config: 
         return redirect(url_for('dashboard.onboarding'))
 
-    month = request.args.get('month', datetime.now().month, type=int)
-    year = datetime.now().year
-    
-    # Tratamento de erro para calendário
-    last_day = calendar.monthrange(year, month)[1]
-    start_date = datetime(year, month, 1)
-    end_date = datetime(year, month, last_day, 23, 59, 59)
-    page = request.args.get('page', 1, type=int)
+    year, month = dashboard_period()
+    start_date, end_date = month_bounds(year, month)
+    cursor = request.args.get('cursor')
 
     base_query = Budget.query.filter(
         Budget.user_id == current_user.id, 
@@ -43,50 +89,37 @@ def dashboard():
         Budget.date <= end_date
     )
 
-    def get_total_sql(status_name):
-        return db.session.query(func.coalesce(func.sum(Budget.final_price), 0.0)).filter(
-            Budget.user_id == current_user.id, 
-            Budget.date >= start_date, 
-            Budget.date <= end_date, 
-            Budget.status == status_name
-        ).scalar()
+    # Totais e gráfico vêm do cache; em miss, do rollup mensal (no máximo 12 x 3 linhas)
+    totals, yearly_revenue, month_count = dashboard_stats.get(current_user.id, year, month)
 
-    total_approved = float(get_total_sql('Aprovado'))
-    total_pending = float(get_total_sql('Pendente'))
-    total_lost = float(get_total_sql('Perdido'))
+    # Keyset em (date, id): custo constante em qualquer página, sem COUNT(*) nem OFFSET.
+    # O total de orçamentos do mês vem do rollup (month_count).
+    pagination = keyset_paginate(base_query, Budget.date, Budget.id, per_page=10, cursor=cursor)
 
-    goal = float(config.monthly_goal)
-    goal_percent = int((total_approved / goal) * 100) if goal > 0 else 0
+    return render_dashboard(config, month, totals, yearly_revenue, month_count, pagination, year=year)
 
-    pagination = base_query.order_by(Budget.date.desc()).paginate(page=page, per_page=10, error_out=False)
-
-    # Query para o gráfico anual
-    yearly_results = db.session.query(
-        db.extract('month', Budget.date).label('month'),
-        func.sum(Budget.final_price).label('total')
-    ).filter(
-        Budget.user_id == current_user.id,
-        db.extract('year', Budget.date) == year,
-        Budget.status == 'Aprovado'
-    ).group_by(db.extract('month', Budget.date)).all()
+@dashboard_bp.route('/dashboard/busca')
+@login_required
+@replica_reads
+def search():
+    config = getattr(current_user, 'config', None)
+    if not config:
+        return redirect(url_for('dashboard.onboarding'))
 
-    revenue_data = [0] * 12
-    for m, total in yearly_results:
-        revenue_data[int(m) - 1] = float(total)
+    q = request.args.get('q', '').strip()[:MAX_QUERY_LENGTH]
+    page = request.args.get('page', 1, type=int)
+    results = search_budgets(current_user.id, q, page=page, per_page=20)
 
-    status_data = [total_approved, total_pending, total_lost]
+    return render_template('search.html', q=q, results=results,
+                           budget_rows=row_fragments.render(results.items))
 
-    return render_template('dashboard.html', 
-                           budgets=pagination.items, 
-                           pagination=pagination, 
-                           config=config, 
-                           month=month, 
-                           total_approved=total_approved, 
-                           total_pending=total_pending, 
-                           total_lost=total_lost, 
-                           goal_percent=goal_percent,
-                           revenue_data=json.dumps(revenue_data), 
-                           status_data=json.dumps(status_data))
+@dashboard_bp.route('/dashboard/cache-stats')
+@login_required
+def cache_stats():
+    # Contadores globais do processo atual, só para depuração local; em produção, o /metrics (com token)
+    if not current_app.debug:
+        abort(404)
+    return jsonify({**dashboard_stats.counters(), 'rows': row_fragments.counters()})
 
 @dashboard_bp.route('/onboarding', methods=['GET', 'POST'])
 @login_required
@@ -105,9 +138,21 @@ def onboarding():
             config = UserConfig(user_id=current_user.id)
             db.session.add(config)
         
+        old_rate = config.hourly_rate
         config.monthly_goal = goal
         config.hourly_rate = hourly
         db.session.commit()
+
+        # Valor/hora mudou: orçamentos pendentes ficariam com preço velho.
+        # Recalcula em segundo plano; sem vaga na fila, faz aqui mesmo como antes.
+        if old_rate is not None and config.hourly_rate != old_rate:
+            try:
+                job_queue.enqueue('reprice_pending', current_user.id)
+                flash('Recalculando os orçamentos pendentes com o novo valor/hora.', 'info')
+            except (JobLimitExceeded, JobUnavailable):
+                updated = reprice_pending_budgets(current_user.id, config.hourly_rate)
+                if updated:
+                    flash(f'{updated} orçamento(s) pendente(s) recalculado(s) com o novo valor/hora.', 'info')
         
         return redirect(url_for('dashboard.dashboard'))
         
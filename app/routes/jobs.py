@@ -0,0 +1,95 @@
+import os
+import uuid
+from flask import Blueprint, request, jsonify, abort, send_file, url_for
+from flask_login import login_required, current_user
+from werkzeug.exceptions import HTTPException
+
+from app.jobs import job_queue, JobLimitExceeded, JobUnavailable
+from app.importer import KINDS
+from app.routes.api import parse_day
+
+jobs_bp = Blueprint('jobs', __name__)
+
+def start_job(task, **kwargs):
+    # 202 + Location: o cliente consulta GET /api/jobs/<id> até status 'done' ou 'failed'
+    try:
+        job_id = job_queue.enqueue(task, current_user.id, **kwargs)
+    except JobLimitExceeded as e:
+        abort(429, description=str(e))
+    except JobUnavailable:
+        abort(503, description='Fila de tarefas indisponível. Tente novamente em instantes.')
+
+    status_url = url_for('jobs.job_status', job_id=job_id)
+    return jsonify({'id': job_id, 'status': 'queued', 'status_url': status_url}), 202, {'Location': status_url}
+
+def owned_job(job_id):
+    try:
+        job = job_queue.get(job_id, user_id=current_user.id)
+    except JobUnavailable:
+        abort(503, description='Fila de tarefas indisponível. Tente novamente em instantes.')
+    if job is None:
+        abort(404)
+    return job
+
+@jobs_bp.route('/export', methods=['POST'])
+@login_required
+def start_export():
+    """Export em segundo plano (?start, ?end, ?status, ?format=csv|xlsx); baixe em /api/jobs/<id>/download."""
+    fmt = request.values.get('format', 'csv')
+    if fmt not in ('csv', 'xlsx'):
+        abort(400, description='Formato inválido (use csv ou xlsx).')
+    if fmt == 'xlsx':
+        try:
+            import xlsxwriter  # noqa: F401
+        except ImportError:
+            abort(501, description='Exportação XLSX indisponível (instale xlsxwriter).')
+
+    # Validadas aqui (400 na hora), repassadas ao job como texto
+    for field in ('start', 'end'):
+        parse_day(request.values.get(field))
+
+    return start_job('export_budgets', start=request.values.get('start') or None,
+                     end=request.values.get('end') or None,
+                     status=request.values.get('status') or None, fmt=fmt)
+
+@jobs_bp.route('/import/<kind>', methods=['POST'])
+@login_required
+def start_import(kind):
+    """Importação de CSV em segundo plano; o relatório sai no 'result' do job."""
+    if kind not in KINDS:
+        abort(404)
+
+    upload = request.files.get('file')
+    if not upload or not upload.filename:
+        abort(400, description='Envie o arquivo CSV no campo "file".')
+
+    # O worker lê do JOB_RESULT_DIR (volume compartilhado) e apaga o arquivo ao terminar
+    path = job_queue.result_path(f'upload-{uuid.uuid4().hex}', 'csv')
+    upload.save(path)
+    try:
+        return start_job('import_csv', kind=kind, path=path)
+    except HTTPException:
+        os.remove(path)
+        raise
+
+@jobs_bp.route('/<job_id>', methods=['GET'])
+@login_required
+def job_status(job_id):
+    job = owned_job(job_id)
+    if job['status'] == 'done' and (job['result'] or {}).get('file'):
+        job['download_url'] = url_for('jobs.job_download', job_id=job_id)
+    return jsonify(job)
+
+@jobs_bp.route('/<job_id>/download', methods=['GET'])
+@login_required
+def job_download(job_id):
+    job = owned_job(job_id)
+    result = job['result'] or {}
+    if job['status'] != 'done' or not result.get('file'):
+        abort(409, description='A tarefa ainda não terminou ou não gerou arquivo.')
+
+    try:
+        return send_file(os.path.join(job_queue.result_dir, os.path.basename(result['file'])), as_attachment=True,
+                         download_name=result['download_name'], mimetype=result['mimetype'])
+    except FileNotFoundError:
+        abort(410, description='Arquivo expirado; gere o export de novo.')
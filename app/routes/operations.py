@@ -4,7 +4,9 @@ from flask_login import login_required, current_user
 # --- CORREÇÕES DE IMPORT ---
 from app import db
 from app.models import Client, Freelancer, Equipment
-from app.utils import safe_decimal
+from app.utils import safe_decimal, normalize_name
+from app.search import suggest_clients
+from app.replica import replica_reads
 
 # --- CRIAÇÃO DO BLUEPRINT ---
 operations_bp = Blueprint('operations', __name__)
@@ -14,6 +16,7 @@ operations_bp = Blueprint('operations', __name__)
 # ==============================================================================
 @operations_bp.route('/clients', methods=['GET', 'POST'])
 @login_required
+@replica_reads
 def my_clients():
     if request.method == 'POST':
         new_client = Client(
@@ -72,6 +75,7 @@ def delete_client(id):
 # ==============================================================================
 @operations_bp.route('/freelas', methods=['GET', 'POST'])
 @login_required
+@replica_reads
 def freelancers():
     if request.method == 'POST':
         new_freela = Freelancer(
@@ -120,6 +124,7 @@ def delete_freelancer(id):
 # ==============================================================================
 @operations_bp.route('/equipamentos', methods=['GET', 'POST'])
 @login_required
+@replica_reads
 def my_equipment():
     if request.method == 'POST':
         new_gear = Equipment(
@@ -173,12 +178,12 @@ def quick_save_client():
     if not data: 
         return jsonify({'success': False, 'error': 'Payload inválido'}), 400
 
-    name = str(data.get('name', '')).strip()
+    name = str(data.get('name', '')).strip()[:100]
     if not name: 
         return jsonify({'success': False, 'error': 'Nome obrigatório'}), 400
 
-    # Verifica se já existe para este usuário
-    existing = Client.query.filter_by(user_id=current_user.id, name=name).first()
+    # Verifica se já existe para este usuário ('joão silva' == 'Joao Silva'), pelo índice (user_id, name_key)
+    existing = Client.query.filter_by(user_id=current_user.id, name_key=normalize_name(name)).first()
     if existing: 
         # Se existe, retorna os dados dele e avisa que já existia (opcional)
         return jsonify({'success': True, 'id': existing.id, 'name': existing.name, 'is_existing': True})
@@ -195,4 +200,12 @@ def quick_save_client():
     db.session.add(new_client)
     db.session.commit()
 
-    return jsonify({'success': True, 'id': new_client.id, 'name': new_client.name})
\ No newline at end of file
+    return jsonify({'success': True, 'id': new_client.id, 'name': new_client.name})
+
+@operations_bp.route('/api/clients/suggest', methods=['GET'])
+@login_required
+@replica_reads
+def suggest_clients_api():
+    # Autocomplete do formulário de orçamento: ?q=joa&limit=10
+    limit = min(max(request.args.get('limit', 10, type=int), 1), 25)
+    return jsonify(suggest_clients(current_user.id, request.args.get('q', '')[:100], limit=limit))
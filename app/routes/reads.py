@@ -0,0 +1,71 @@
+from types import SimpleNamespace
+from flask import Blueprint, render_template, request, redirect, url_for, abort
+from flask_login import login_required, current_user
+from sqlalchemy import and_, select
+
+from app.models import Budget, BudgetItem
+from app.aio import async_reads
+from app.stats import dashboard_stats
+from app.rollup import dashboard_totals_statement, summarize_dashboard_rows
+from app.pagination import keyset_statement, keyset_page
+from app.routes.dashboard import dashboard_period, month_bounds, render_dashboard
+from app.routes.budget import catalog_json_response
+
+# Variantes das páginas de leitura que disparam as queries independentes em paralelo
+# (engine assíncrona em app/aio.py). Mesmos templates e mesmas regras das rotas normais.
+reads_bp = Blueprint('reads', __name__)
+
+@reads_bp.route('/dashboard')
+@login_required
+def dashboard():
+    config = getattr(current_user, 'config', None)
+    if not config: 
+        return redirect(url_for('dashboard.onboarding'))
+
+    year, month = dashboard_period()
+    start_date, end_date = month_bounds(year, month)
+
+    page_stmt, direction = keyset_statement(
+        select(Budget.__table__).where(
+            Budget.user_id == current_user.id,
+            Budget.date >= start_date,
+            Budget.date <= end_date
+        ),
+        Budget.date, Budget.id, 10, request.args.get('cursor')
+    )
+
+    # Página de orçamentos + (em cache miss) totais do rollup, ao mesmo tempo
+    cached = dashboard_stats.lookup(current_user.id, year, month)
+    if cached is None:
+        page_rows, totals_rows = async_reads.fetch_all(page_stmt, dashboard_totals_statement(current_user.id, year))
+        totals, yearly_revenue, month_count = summarize_dashboard_rows(totals_rows, month)
+        dashboard_stats.store(current_user.id, year, month, totals, yearly_revenue, month_count)
+    else:
+        (page_rows,) = async_reads.fetch_all(page_stmt)
+        totals, yearly_revenue, month_count = cached
+
+    pagination = keyset_page(page_rows, direction, Budget.date, Budget.id, 10)
+    return render_dashboard(config, month, totals, yearly_revenue, month_count, pagination,
+                            page_endpoint='reads.dashboard', year=year)
+
+@reads_bp.route('/orcamento/print/<int:id>', methods=['GET'])
+@login_required
+def print_budget(id):
+    # Orçamento e itens em paralelo; o JOIN no dono mantém a proteção Anti-IDOR nos itens
+    budget_rows, item_rows = async_reads.fetch_all(
+        select(Budget.__table__).where(Budget.id == id, Budget.user_id == current_user.id),
+        select(BudgetItem.__table__).join(Budget, and_(Budget.id == BudgetItem.budget_id,
+                                                      Budget.date == BudgetItem.budget_date))
+            .where(BudgetItem.budget_id == id, Budget.user_id == current_user.id)
+            .order_by(BudgetItem.id)
+    )
+    if not budget_rows:
+        abort(404)
+
+    budget = SimpleNamespace(**budget_rows[0]._mapping, items=item_rows)
+    return render_template('print_budget.html', budget=budget, config=current_user.config)
+
+@reads_bp.route('/catalogo.json', methods=['GET'])
+@login_required
+def catalog_json():
+    return catalog_json_response(concurrent=True)
@@ -0,0 +1,185 @@
+"""
+Busca textual nos orçamentos (título, cliente e descrição).
+
+Postgres: coluna gerada budget.search_vector (tsvector 'portuguese', sem acento) com
+índice GIN, criada na migração; o banco mantém a coluna a cada INSERT/UPDATE.
+SQLite (dev): tabela FTS5 budget_fts com conteúdo externo, sincronizada por triggers.
+Nos dois casos cada termo vira prefixo ('orça' acha 'orçamento') e o resultado vem
+ordenado por relevância (ts_rank_cd / bm25).
+
+Banco criado com db.create_all(): no SQLite a FTS e os triggers nascem junto com a tabela
+budget (after_create). Sem índice textual (Postgres sem a migração, base antiga ou outro
+banco) a busca cai num ILIKE por termo, mais lento e sem relevância, até um
+'flask rebuild-search-index' ou 'flask db upgrade'.
+
+Autocomplete de clientes: prefixo em client.name_key (nome sem acento/caixa), que
+tem índice (user_id, name_key) e, no Postgres, um GIN trigram para o LIKE.
+"""
+import logging
+import re
+
+from sqlalchemy import DDL, and_, column, event, func, inspect, literal_column, or_, select, table, text
+
+from app import db
+from app.models import Budget, Client
+from app.utils import normalize_name
+
+logger = logging.getLogger('app.search')
+
+MAX_TERMS = 8
+MAX_QUERY_LENGTH = 200
+
+# Peso por coluna no bm25 (mesma ordem da tabela FTS): título e cliente valem mais
+_BM25 = 'bm25(budget_fts, 10.0, 10.0, 4.0)'
+
+_fts = table('budget_fts', column('rowid'))
+
+# Mesmo DDL da migração e8b3c5d71a24, para bancos de dev criados com db.create_all()
+SQLITE_FTS_DDL = (
+    """CREATE VIRTUAL TABLE IF NOT EXISTS budget_fts USING fts5(
+        title, client, description,
+        content='budget', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS budget_fts_ai AFTER INSERT ON budget BEGIN
+        INSERT INTO budget_fts(rowid, title, client, description)
+        VALUES (new.id, new.title, new.client, new.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS budget_fts_ad AFTER DELETE ON budget BEGIN
+        INSERT INTO budget_fts(budget_fts, rowid, title, client, description)
+        VALUES ('delete', old.id, old.title, old.client, old.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS budget_fts_au AFTER UPDATE OF title, client, description ON budget BEGIN
+        INSERT INTO budget_fts(budget_fts, rowid, title, client, description)
+        VALUES ('delete', old.id, old.title, old.client, old.description);
+        INSERT INTO budget_fts(rowid, title, client, description)
+        VALUES (new.id, new.title, new.client, new.description);
+    END""",
+)
+
+
+for _ddl in SQLITE_FTS_DDL:
+    event.listen(Budget.__table__, 'after_create', DDL(_ddl).execute_if(dialect='sqlite'))
+
+# Por engine: o índice textual existe? (checado uma vez por processo)
+_index_ready = {}
+
+
+def search_terms(q):
+    """Palavras da busca (sem operadores nem pontuação), no máximo MAX_TERMS."""
+    return re.findall(r'\w+', (q or '')[:MAX_QUERY_LENGTH])[:MAX_TERMS]
+
+
+class SearchPage:
+    """Página de resultados por relevância (OFFSET: a busca já é restrita pelo índice)."""
+
+    def __init__(self, items, page, has_next):
+        self.items = items
+        self.page = page
+        self.has_next = has_next
+        self.has_prev = page > 1
+
+
+def _postgres_statement(user_id, terms):
+    # 'orca:* & joao:*' -> to_tsquery aplica o stemmer português em cada prefixo
+    query = func.to_tsquery('portuguese', func.cineorca_unaccent(' & '.join(f'{t}:*' for t in terms)))
+    vector = literal_column('budget.search_vector')
+    rank = func.ts_rank_cd(vector, query)
+    return select(Budget, rank.label('rank')) \
+        .where(Budget.user_id == user_id, vector.op('@@')(query)) \
+        .order_by(rank.desc(), Budget.date.desc(), Budget.id.desc())
+
+
+def _sqlite_statement(user_id, terms):
+    # Cada termo entre aspas (sem sintaxe FTS vinda do usuário) e com * de prefixo
+    match = ' '.join(f'"{t}"*' for t in terms)
+    rank = literal_column(_BM25)
+    return select(Budget, rank.label('rank')) \
+        .join(_fts, _fts.c.rowid == Budget.id) \
+        .where(Budget.user_id == user_id, text('budget_fts MATCH :match').bindparams(match=match)) \
+        .order_by(rank.asc(), Budget.date.desc(), Budget.id.desc())
+
+
+def _like_statement(user_id, terms):
+    # Sem índice textual: cada termo em título, cliente ou descrição, mais recentes primeiro
+    conditions = []
+    for term in terms:
+        pattern = f'%{_like_escape(term)}%'
+        conditions.append(or_(*(col.ilike(pattern, escape='\\')
+                                for col in (Budget.title, Budget.client, Budget.description))))
+    return select(Budget) \
+        .where(Budget.user_id == user_id, and_(*conditions)) \
+        .order_by(Budget.date.desc(), Budget.id.desc())
+
+
+def has_search_index(engine):
+    key = str(engine.url)
+    if key not in _index_ready:
+        dialect = engine.dialect.name
+        if dialect == 'sqlite':
+            ready = inspect(engine).has_table('budget_fts')
+        elif dialect == 'postgresql':
+            ready = any(col['name'] == 'search_vector' for col in inspect(engine).get_columns('budget'))
+        else:
+            ready = False
+        if not ready:
+            logger.warning(f'Sem índice de busca textual em {dialect}; usando ILIKE (rode flask rebuild-search-index).')
+        _index_ready[key] = ready
+    return _index_ready[key]
+
+
+def search_budgets(user_id, q, page=1, per_page=20):
+    """Orçamentos do usuário que casam com todos os termos, do mais relevante para o menos."""
+    terms = search_terms(q)
+    page = max(page, 1)
+    if not terms:
+        return SearchPage([], page, False)
+
+    engine = db.session.get_bind()
+    if not has_search_index(engine):
+        stmt = _like_statement(user_id, terms)
+    elif engine.dialect.name == 'postgresql':
+        stmt = _postgres_statement(user_id, terms)
+    else:
+        stmt = _sqlite_statement(user_id, terms)
+
+    rows = db.session.execute(stmt.limit(per_page + 1).offset((page - 1) * per_page)).all()
+    return SearchPage([row.Budget for row in rows[:per_page]], page, len(rows) > per_page)
+
+
+def _like_escape(value):
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def suggest_clients(user_id, q, limit=10):
+    """
+    Clientes ativos cujo nome (ou uma palavra do nome) começa com `q`, sem diferenciar
+    acento e caixa: 'joa' acha 'João Silva' e 'Padaria São João'. Início do nome primeiro.
+    """
+    key = normalize_name(q)
+    if not key:
+        return []
+
+    escaped = _like_escape(key)
+    starts = Client.name_key.like(f'{escaped}%', escape='\\')
+    word = Client.name_key.like(f'% {escaped}%', escape='\\')
+    stmt = (
+        select(Client.id, Client.name, Client.cnpj, Client.phone, Client.address)
+        .where(Client.user_id == user_id, Client.active == True, or_(starts, word))  # noqa: E712
+        .order_by(starts.desc(), Client.name_key, Client.id)
+        .limit(limit)
+    )
+    return [dict(row._mapping) for row in db.session.execute(stmt)]
+
+
+def rebuild_search_index():
+    """SQLite: cria a FTS (se faltar) e reindexa tudo. Postgres: REINDEX do GIN (a coluna é gerada)."""
+    conn = db.session.connection()
+    if conn.dialect.name == 'sqlite':
+        for ddl in SQLITE_FTS_DDL:
+            conn.exec_driver_sql(ddl)
+        conn.exec_driver_sql("INSERT INTO budget_fts(budget_fts) VALUES ('rebuild')")
+    elif conn.dialect.name == 'postgresql':
+        conn.exec_driver_sql('REINDEX INDEX idx_budget_search')
+    db.session.commit()
+    _index_ready.pop(str(conn.engine.url), None)
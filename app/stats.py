@@ -0,0 +1,93 @@
+import threading
+
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.analytics import revenue_analytics
+from app.cache import cache
+from app.rollup import STATUSES, get_dashboard_totals
+from app.money import Money
+
+
+class DashboardStats:
+    """Totais do dashboard por usuário/ano/mês, com cache e invalidação no commit."""
+
+    def __init__(self, cache):
+        self.cache = cache
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(user_id, year, month):
+        return f'dashboard:v2:{user_id}:{year}:{month}'
+
+    def lookup(self, user_id, year, month):
+        """Só o cache: (totals, revenue, month_count) ou None em miss."""
+        payload = self.cache.get(self.key(user_id, year, month))
+        if payload is None:
+            self._count(hit=False)
+            return None
+
+        self._count(hit=True)
+        totals = {status: Money(payload['totals'][status]) for status in STATUSES}
+        revenue = [Money(v) for v in payload['revenue']]
+        return totals, revenue, payload['count']
+
+    def store(self, user_id, year, month, totals, revenue, month_count):
+        self.cache.set(self.key(user_id, year, month), {
+            'totals': {status: str(totals[status]) for status in STATUSES},
+            'revenue': [str(v) for v in revenue],
+            'count': month_count,
+        }, ttl=current_app.config.get('DASHBOARD_CACHE_TTL', 3600))
+
+    def get(self, user_id, year, month):
+        """Retorna (totals, revenue, month_count); só vai ao banco em cache miss."""
+        cached = self.lookup(user_id, year, month)
+        if cached is not None:
+            return cached
+
+        totals, revenue, month_count = get_dashboard_totals(user_id, year, month)
+        self.store(user_id, year, month, totals, revenue, month_count)
+        return totals, revenue, month_count
+
+    def invalidate(self, user_id, year):
+        # O gráfico anual entra em todos os meses, então o ano inteiro cai junto
+        self.cache.delete(*[self.key(user_id, year, m) for m in range(1, 13)])
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    @property
+    def hit_ratio(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def counters(self):
+        return {'hits': self.hits, 'misses': self.misses, 'hit_ratio': self.hit_ratio}
+
+
+dashboard_stats = DashboardStats(cache)
+
+
+# As chaves tocadas são anotadas em session.info pelo listener do rollup (after_flush)
+# e só invalidadas depois do commit, para não cachear dados de uma transação desfeita.
+@event.listens_for(Session, 'after_commit')
+def _invalidate_after_commit(session):
+    touched = session.info.pop('rollup_touched', None)
+    if not touched:
+        return
+    for user_id, year in touched:
+        dashboard_stats.invalidate(user_id, year)
+    for user_id in {user_id for user_id, _ in touched}:
+        revenue_analytics.invalidate(user_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_on_rollback(session):
+    session.info.pop('rollup_touched', None)
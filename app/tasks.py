@@ -0,0 +1,74 @@
+"""Tarefas executadas pela fila (app/jobs.py): rodam no worker, nunca no request."""
+import os
+from datetime import datetime
+
+from app import db
+from app.export import EXPORT_CHUNK, export_rows, iter_csv, write_xlsx
+from app.importer import import_csv, open_csv
+from app.jobs import job_queue
+from app.models import UserConfig
+from app.pricing import reprice_pending_budgets
+
+EXPORT_MIMETYPES = {
+    'csv': 'text/csv',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+
+def _day(value):
+    # kwargs do job passam por JSON: datas chegam como 'AAAA-MM-DD'
+    return datetime.strptime(value, '%Y-%m-%d') if value else None
+
+
+@job_queue.task('export_budgets')
+def export_budgets_task(job, start=None, end=None, status=None, fmt='csv'):
+    """Orçamentos + itens do período (export_rows), gravados em JOB_RESULT_DIR para download posterior."""
+    job_queue.prune_results()
+    written = 0
+
+    def counted(rows):
+        nonlocal written
+        for row in rows:
+            yield row
+            written += 1
+            if written % EXPORT_CHUNK == 0:
+                job.progress(written, message='linhas exportadas')
+
+    rows = counted(export_rows(job.user_id, _day(start), _day(end), status))
+    path = job_queue.result_path(job.id, fmt)
+    tmp = f'{path}.tmp'
+    if fmt == 'xlsx':
+        write_xlsx(rows, tmp)
+    else:
+        with open(tmp, 'w', encoding='utf-8', newline='') as f:
+            for chunk in iter_csv(rows):
+                f.write(chunk)
+    # Retry não deixa arquivo pela metade: só o rename publica o resultado
+    os.replace(tmp, path)
+
+    job.progress(written, written, 'concluído')
+    return {'file': os.path.basename(path), 'rows': written,
+            'download_name': f'orcamentos.{fmt}', 'mimetype': EXPORT_MIMETYPES[fmt]}
+
+
+# Sem retry: o upload é apagado ao final e uma importação parcial já gravou parte das linhas
+@job_queue.task('import_csv', max_retries=0)
+def import_csv_task(job, kind, path):
+    try:
+        with open_csv(path) as f:
+            report = import_csv(job.user_id, kind, f)
+    finally:
+        os.remove(path)
+    return report.to_dict()
+
+
+@job_queue.task('reprice_pending')
+def reprice_pending_task(job):
+    # Valor/hora lido na execução: se o usuário mudou de novo nesse meio tempo, vale o mais recente
+    config = db.session.query(UserConfig).filter_by(user_id=job.user_id).first()
+    if config is None or config.hourly_rate is None:
+        return {'updated': 0}
+
+    updated = reprice_pending_budgets(job.user_id, config.hourly_rate,
+                                      progress=lambda n: job.progress(n, message='orçamentos recalculados'))
+    return {'updated': updated}
@@ -0,0 +1,210 @@
+import json
+import logging
+import time
+
+from blinker import Namespace
+from flask import g, has_request_context, request, template_rendered, before_render_template
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+logger = logging.getLogger('app.timing')
+
+# Sinal disparado a cada checkout medido (sender = pool, seconds = duração); usado pelo /metrics
+pool_checkout = Namespace().signal('pool-checkout')
+
+
+class RequestTimer:
+    """Acumuladores de um request: SQL, espera do pool e renderização de templates."""
+    __slots__ = ('started_at', 'sql_count', 'sql_seconds', 'pool_count', 'pool_seconds',
+                 'template_seconds', '_template_depth', '_template_started_at')
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.sql_count = 0
+        self.sql_seconds = 0.0
+        self.pool_count = 0
+        self.pool_seconds = 0.0
+        self.template_seconds = 0.0
+        self._template_depth = 0
+        self._template_started_at = 0.0
+
+    def elapsed(self):
+        return time.perf_counter() - self.started_at
+
+
+def current_timer():
+    """Timer do request atual (None fora de request ou com REQUEST_TIMING desligado)."""
+    if not has_request_context():
+        return None
+    return g.get('_request_timer')
+
+
+def params_shape(parameters):
+    """Formato dos parâmetros sem os valores (nada de dado de cliente no log)."""
+    if isinstance(parameters, (list, tuple)) and parameters and isinstance(parameters[0], (dict, list, tuple)):
+        return f'{len(parameters)} x {params_shape(parameters[0])}'
+    if isinstance(parameters, dict):
+        return '{' + ', '.join(f'{k}: {type(v).__name__}' for k, v in parameters.items()) + '}'
+    if isinstance(parameters, (list, tuple)):
+        return '(' + ', '.join(type(v).__name__ for v in parameters) + ')'
+    return type(parameters).__name__
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool que mede o checkout: espera na fila + pool_pre_ping + conexão nova, se houver."""
+
+    def connect(self):
+        started_at = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            elapsed = time.perf_counter() - started_at
+            timer = current_timer()
+            if timer is not None:
+                timer.pool_count += 1
+                timer.pool_seconds += elapsed
+            pool_checkout.send(self, seconds=elapsed)
+
+
+class RequestTiming:
+    """
+    Instrumentação por request: nº de queries, tempo de SQL, espera no pool e tempo de
+    template. Sai no header Server-Timing e numa linha de log JSON por request.
+    Queries acima de SLOW_QUERY_MS são logadas com o SQL e o formato dos parâmetros.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.header = True
+        self.slow_query_seconds = None
+
+    def init_app(self, app):
+        self.enabled = app.config.get('REQUEST_TIMING', True)
+        self.header = app.config.get('REQUEST_TIMING_HEADER', True)
+        slow_ms = app.config.get('SLOW_QUERY_MS')
+        self.slow_query_seconds = slow_ms / 1000 if slow_ms else None
+        app.extensions['request_timing'] = self
+        if logger.level == logging.NOTSET:
+            logger.setLevel(logging.INFO)
+
+        # Precisa vir antes do db.init_app: só troca o pool quando a config já usa QueuePool (pool_size)
+        options = dict(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+        if self.enabled and 'pool_size' in options and 'poolclass' not in options:
+            options['poolclass'] = TimedQueuePool
+            app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+        _listen_engine_events()
+
+        if not self.enabled:
+            return
+
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        before_render_template.connect(self._template_started, app)
+        template_rendered.connect(self._template_finished, app)
+
+    # --- Ciclo do request -----------------------------------------------------
+
+    def _start(self):
+        g._request_timer = RequestTimer()
+
+    def _finish(self, response):
+        timer = g.pop('_request_timer', None)
+        if timer is None:
+            return response
+
+        total = timer.elapsed()
+        if self.header:
+            metrics = [
+                f'db;desc="SQL ({timer.sql_count} queries)";dur={timer.sql_seconds * 1000:.1f}',
+                f'tpl;desc="Templates";dur={timer.template_seconds * 1000:.1f}',
+                f'app;desc="Total";dur={total * 1000:.1f}',
+            ]
+            if timer.pool_count:
+                metrics.insert(1, f'pool;desc="Checkout do pool";dur={timer.pool_seconds * 1000:.1f}')
+            response.headers['Server-Timing'] = ', '.join(metrics)
+
+        # Streaming (NDJSON/CSV): o corpo ainda não foi gerado, então os números cobrem só o início
+        logger.info(json.dumps({
+            'event': 'request',
+            'method': request.method,
+            'endpoint': request.endpoint,
+            'path': request.path,
+            'status': response.status_code,
+            'duration_ms': round(total * 1000, 2),
+            'sql_count': timer.sql_count,
+            'sql_ms': round(timer.sql_seconds * 1000, 2),
+            'pool_checkouts': timer.pool_count,
+            'pool_wait_ms': round(timer.pool_seconds * 1000, 2),
+            'template_ms': round(timer.template_seconds * 1000, 2),
+            'streamed': response.is_streamed,
+        }))
+        return response
+
+    # --- Templates (render_template dentro de render_template conta uma vez só) ---
+
+    def _template_started(self, sender, template, context, **extra):
+        timer = current_timer()
+        if timer is None:
+            return
+        if timer._template_depth == 0:
+            timer._template_started_at = time.perf_counter()
+        timer._template_depth += 1
+
+    def _template_finished(self, sender, template, context, **extra):
+        timer = current_timer()
+        if timer is None or timer._template_depth == 0:
+            return
+        timer._template_depth -= 1
+        if timer._template_depth == 0:
+            timer.template_seconds += time.perf_counter() - timer._template_started_at
+
+    # --- SQL ---------------------------------------------------------------------
+
+    def query_finished(self, statement, parameters, executemany, elapsed):
+        timer = current_timer()
+        if timer is not None:
+            timer.sql_count += 1
+            timer.sql_seconds += elapsed
+
+        if self.slow_query_seconds is not None and elapsed >= self.slow_query_seconds:
+            logger.warning(json.dumps({
+                'event': 'slow_query',
+                'endpoint': request.endpoint if has_request_context() else None,
+                'duration_ms': round(elapsed * 1000, 2),
+                'statement': ' '.join(statement.split()),
+                'params': params_shape(parameters),
+                'executemany': executemany,
+            }, ensure_ascii=False))
+
+
+request_timing = RequestTiming()
+
+_listening = False
+
+
+def _listen_engine_events():
+    # Eventos na classe Engine: valem para qualquer engine criada depois (inclusive em testes)
+    global _listening
+    if _listening:
+        return
+    _listening = True
+
+    @event.listens_for(Engine, 'before_cursor_execute')
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('_query_started_at', []).append(time.perf_counter())
+
+    @event.listens_for(Engine, 'after_cursor_execute')
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.get('_query_started_at')
+        if not started:
+            return
+        request_timing.query_finished(statement, parameters, executemany, time.perf_counter() - started.pop())
+
+    @event.listens_for(Engine, 'handle_error')
+    def _error(exception_context):
+        # Query que falhou não chega no after_cursor_execute: descarta o início pendente
+        conn = exception_context.connection
+        if conn is not None and conn.info.get('_query_started_at'):
+            conn.info['_query_started_at'].pop()
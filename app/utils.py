@@ -1,5 +1,7 @@
+import unicodedata
 from decimal import Decimal, ROUND_HALF_UP
 
+
 def safe_decimal(val):
     try:
         if val is None or val == '': return Decimal('0.00')
@@ -8,6 +10,14 @@ def safe_decimal(val):
     except:
         return Decimal('0.00')
 
+
 def safe_int(val, default=0):
     try: return int(float(val))
-    except: return default
\ No newline at end of file
+    except: return default
+
+
+def normalize_name(val):
+    # '  João  da SILVA ' -> 'joao da silva': chave de busca/deduplicação sem acento e sem caixa
+    text = unicodedata.normalize('NFKD', val or '')
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return ' '.join(text.casefold().split())[:100]
@@ -16,6 +16,67 @@ class Config:
     # Rate Limit padrão (Memória - Ok para Dev)
     RATELIMIT_STORAGE_URI = "memory://"
 
+    # Cache (Redis via REDIS_URL em produção; LRU em memória quando não há Redis)
+    CACHE_LOCAL_MAX_ENTRIES = 1024
+    DASHBOARD_CACHE_TTL = 3600
+    CATALOG_CACHE_TTL = 86400
+    ROW_FRAGMENT_CACHE_TTL = 86400
+    # Séries de /api/analytics de períodos já encerrados; limite de baldes por consulta
+    ANALYTICS_CACHE_TTL = 86400
+    ANALYTICS_MAX_BUCKETS = 400
+    # Cache curto de User + UserConfig no user_loader (0 = desligado)
+    IDENTITY_CACHE_TTL = 0
+
+    # Hash de senha: custo configurável (hashes antigos são atualizados no login),
+    # processos dedicados (0 = inline) e limite de hashes simultâneos por worker
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000')
+    PASSWORD_HASH_WORKERS = 0
+    PASSWORD_HASH_MAX_CONCURRENCY = 4
+    PASSWORD_HASH_TIMEOUT = 10
+
+    # Leituras em paralelo nas rotas /async/* (asyncpg/aiosqlite). Desligado = mesmas queries em sequência
+    ASYNC_READS = os.environ.get('ASYNC_READS') == '1'
+
+    # Instrumentação por request (Server-Timing + log JSON) e log de queries lentas
+    REQUEST_TIMING = True
+    REQUEST_TIMING_HEADER = True
+    SLOW_QUERY_MS = int(os.environ.get('SLOW_QUERY_MS', 200))
+
+    # Prometheus em /metrics (com METRICS_TOKEN, exige 'Authorization: Bearer <token>'; obrigatório em produção)
+    METRICS_ENABLED = True
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    # Multiprocesso (Gunicorn): intervalo mínimo para cada worker publicar os contadores internos
+    METRICS_SYNC_SECONDS = int(os.environ.get('METRICS_SYNC_SECONDS', 15))
+
+    # PDFs gerados no servidor: cache em disco por hash do conteúdo, com limite de tamanho (LRU)
+    PDF_CACHE_DIR = os.environ.get('PDF_CACHE_DIR')
+    PDF_CACHE_MAX_BYTES = int(os.environ.get('PDF_CACHE_MAX_BYTES', 200 * 1024 * 1024))
+
+    # Pool: testa a conexão (SELECT 1) só se ficou parada mais que isso, em vez do pool_pre_ping
+    POOL_PING_IDLE_SECONDS = float(os.environ.get('POOL_PING_IDLE_SECONDS', 30))
+    # pgbouncer em transaction pooling: sem prepared statements reaproveitados no asyncpg
+    PGBOUNCER = os.environ.get('DB_PGBOUNCER') == '1'
+
+    # Réplica de leitura opcional (app/replica.py): views @replica_reads leem dela em GET
+    REPLICA_DATABASE_URI = os.environ.get('REPLICA_DATABASE_URL')
+    REPLICA_MAX_LAG_SECONDS = float(os.environ.get('REPLICA_MAX_LAG_SECONDS', 5))
+    REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', 10))
+    REPLICA_LAG_CHECK_SECONDS = 5
+
+    # 'flask maintain-partitions' (Postgres): anos mantidos anexados em budget/budget_item; vazio = não arquiva
+    PARTITION_KEEP_YEARS = int(os.environ['PARTITION_KEEP_YEARS']) if os.environ.get('PARTITION_KEEP_YEARS') else None
+
+    # Fila de tarefas (app/jobs.py): Redis com REDIS_URL (processo 'worker' do Procfile),
+    # senão threads no próprio processo. Resultados (export) em JOB_RESULT_DIR, visível ao web e ao worker
+    JOBS_BACKEND = os.environ.get('JOBS_BACKEND', 'redis')
+    JOB_LOCAL_WORKERS = 2
+    JOB_MAX_PER_USER = int(os.environ.get('JOB_MAX_PER_USER', 2))
+    JOB_MAX_RETRIES = 2
+    JOB_RETRY_BACKOFF = 5
+    JOB_TTL_SECONDS = 86400
+    JOB_STALE_SECONDS = 3600
+    JOB_RESULT_DIR = os.environ.get('JOB_RESULT_DIR')
+
     @staticmethod
     def init_app(app):
         pass
@@ -45,9 +106,17 @@ class ProductionConfig(Config):
 
     SQLALCHEMY_DATABASE_URI = _db_url
 
+    # Mesmas correções para a réplica (opcional)
+    _replica_url = os.environ.get('REPLICA_DATABASE_URL')
+    if _replica_url and _replica_url.startswith("postgres://"):
+        _replica_url = _replica_url.replace("postgres://", "postgresql://", 1)
+    if _replica_url and '?' not in _replica_url:
+        _replica_url += '?sslmode=require'
+    REPLICA_DATABASE_URI = _replica_url
+
     # Correção 3: Engine Options para evitar desconexões do Neon
+    # Sem pool_pre_ping: app/pooling.py só testa conexões paradas há mais de POOL_PING_IDLE_SECONDS
     SQLALCHEMY_ENGINE_OPTIONS = {
-        "pool_pre_ping": True,        # Testa a conexão antes de usar (Crítico para Neon)
         "pool_recycle": 300,          # Recicla a cada 5 min
         "pool_size": 10,              # Ajuste conforme seu plano
         "max_overflow": 20,
@@ -59,6 +128,21 @@ class ProductionConfig(Config):
     if REDIS_URL:
         RATELIMIT_STORAGE_URI = REDIS_URL
 
+    # Evita 2 round trips ao Neon (user + config) em toda página autenticada
+    IDENTITY_CACHE_TTL = 30
+
+    # Hash de senha fora do worker web, com no máximo 2 hashes simultâneos por worker
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))
+    PASSWORD_HASH_MAX_CONCURRENCY = 2
+
+    # Pool da engine assíncrona (uma por worker, separada do pool síncrono).
+    # Sem pool_pre_ping: o mesmo teste após POOL_PING_IDLE_SECONDS do pool síncrono (app/pooling.py)
+    ASYNC_ENGINE_OPTIONS = {
+        "pool_size": 5,
+        "max_overflow": 5,
+        "pool_recycle": 300
+    }
+
     # P2: Observabilidade Sentry
     SENTRY_DSN = os.environ.get('SENTRY_DSN')
 
@@ -92,6 +176,10 @@ class ProductionConfig(Config):
         if not cls.REDIS_URL:
             errors.append("❌ REDIS_URL ausente. O Rate Limit não funcionará corretamente.")
 
+        # Valida /metrics (contadores internos e endpoints expostos a qualquer um sem token)
+        if cls.METRICS_ENABLED and not cls.METRICS_TOKEN:
+            errors.append("❌ METRICS_TOKEN ausente. O /metrics ficaria público.")
+
         if errors:
             raise ValueError("\n".join(["\n🚨 ERRO DE CONFIGURAÇÃO DE PRODUÇÃO:"] + errors))
 
@@ -0,0 +1,23 @@
+# Lido automaticamente pelo Gunicorn (Procfile: gunicorn wsgi:app)
+import os
+import shutil
+
+# Vários workers: cada processo grava as métricas em arquivos aqui e o /metrics soma todos.
+# Definido antes de os workers importarem o app (o prometheus_client lê na importação).
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/cineorca-metrics')
+
+
+def on_starting(server):
+    # Métricas do Prometheus em modo multiprocesso: começa com o diretório limpo a cada deploy
+    directory = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory, exist_ok=True)
+
+
+def child_exit(server, worker):
+    # Gauges 'livesum' do worker que morreu deixam de contar
+    try:
+        from prometheus_client import multiprocess
+    except ImportError:
+        return
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,34 @@
+"""Budget monthly rollup
+
+Revision ID: 3f1a7c2d9b41
+Revises: 9c18cfca53cf
+Create Date: 2026-10-18 09:12:40.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1a7c2d9b41'
+down_revision = '9c18cfca53cf'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Depois do upgrade, rode 'flask rebuild-rollup' para o backfill dos dados existentes.
+    op.create_table('budget_monthly_rollup',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('year', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('month', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('total', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'year', 'month', 'status')
+    )
+
+
+def downgrade():
+    op.drop_table('budget_monthly_rollup')
@@ -0,0 +1,133 @@
+"""Partition budget and budget_item by year
+
+Revision ID: a91c6e3f5d28
+Revises: f4a7d2b9c3e5
+Create Date: 2026-10-18 19:02:55.771943
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a91c6e3f5d28'
+down_revision = 'f4a7d2b9c3e5'
+branch_labels = None
+depends_on = None
+
+# Índices de 'budget' e 'budget_item' recriados nas tabelas novas (viram índices particionados)
+BUDGET_INDEXES = (
+    'CREATE INDEX idx_budget_user_date ON budget (user_id, date)',
+    'CREATE INDEX idx_budget_user_status ON budget (user_id, status)',
+    'CREATE INDEX ix_budget_date ON budget (date)',
+    'CREATE INDEX ix_budget_status ON budget (status)',
+    'CREATE INDEX ix_budget_user_id ON budget (user_id)',
+    'CREATE INDEX idx_budget_search ON budget USING gin (search_vector)',
+)
+ITEM_INDEXES = (
+    'CREATE INDEX ix_budget_item_budget_id ON budget_item (budget_id)',
+)
+
+
+def _columns(bind, table):
+    # Colunas graváveis, na ordem da tabela (search_vector é GENERATED e fica de fora)
+    return ', '.join(row[0] for row in bind.execute(sa.text(
+        "SELECT column_name FROM information_schema.columns "
+        "WHERE table_schema = current_schema() AND table_name = :table AND is_generated = 'NEVER' "
+        "ORDER BY ordinal_position"
+    ), {'table': table}))
+
+
+def _year_range(bind):
+    first, last = bind.execute(sa.text(
+        'SELECT EXTRACT(YEAR FROM MIN(date))::int, EXTRACT(YEAR FROM MAX(date))::int FROM budget_legacy'
+    )).one()
+    current = datetime.utcnow().year
+    # Partições até o ano que vem; daí em diante, 'flask maintain-partitions'
+    return range(min(first or current, current), max(last or current, current + 1) + 1)
+
+
+def _create_constraints(partitioned):
+    # Em tabela particionada a chave de partição precisa estar na PK (e portanto na FK dos itens)
+    if partitioned:
+        op.execute('ALTER TABLE budget ADD CONSTRAINT budget_pkey PRIMARY KEY (id, date)')
+        op.execute('ALTER TABLE budget_item ADD CONSTRAINT budget_item_pkey PRIMARY KEY (id, budget_date)')
+        # O item sempre cai na partição do ano do seu orçamento
+        op.execute('ALTER TABLE budget_item ADD CONSTRAINT budget_item_budget_fkey '
+                   'FOREIGN KEY (budget_id, budget_date) REFERENCES budget (id, date) '
+                   'ON DELETE CASCADE ON UPDATE CASCADE')
+    else:
+        op.execute('ALTER TABLE budget ADD CONSTRAINT budget_pkey PRIMARY KEY (id)')
+        op.execute('ALTER TABLE budget_item ADD CONSTRAINT budget_item_pkey PRIMARY KEY (id)')
+        op.execute('ALTER TABLE budget_item ADD CONSTRAINT budget_item_budget_id_fkey '
+                   'FOREIGN KEY (budget_id) REFERENCES budget (id)')
+    op.execute('ALTER TABLE budget ADD CONSTRAINT budget_user_id_fkey FOREIGN KEY (user_id) REFERENCES "user" (id)')
+    for ddl in BUDGET_INDEXES + ITEM_INDEXES:
+        op.execute(ddl)
+
+
+def _swap_tables(bind, partitioned):
+    """Recria budget/budget_item (particionadas ou não) copiando os dados das atuais."""
+    op.execute('ALTER TABLE budget RENAME TO budget_legacy')
+    op.execute('ALTER TABLE budget_item RENAME TO budget_item_legacy')
+
+    suffix = ' PARTITION BY RANGE (date)' if partitioned else ''
+    op.execute(f'CREATE TABLE budget (LIKE budget_legacy INCLUDING DEFAULTS INCLUDING GENERATED){suffix}')
+    suffix = ' PARTITION BY RANGE (budget_date)' if partitioned else ''
+    op.execute(f'CREATE TABLE budget_item (LIKE budget_item_legacy INCLUDING DEFAULTS){suffix}')
+
+    if partitioned:
+        for year in _year_range(bind):
+            bounds = f"FROM ('{year}-01-01') TO ('{year + 1}-01-01')"
+            op.execute(f'CREATE TABLE budget_y{year} PARTITION OF budget FOR VALUES {bounds}')
+            op.execute(f'CREATE TABLE budget_item_y{year} PARTITION OF budget_item FOR VALUES {bounds}')
+
+    columns = _columns(bind, 'budget_legacy')
+    op.execute(f'INSERT INTO budget ({columns}) SELECT {columns} FROM budget_legacy')
+    columns = _columns(bind, 'budget_item_legacy')
+    op.execute(f'INSERT INTO budget_item ({columns}) SELECT {columns} FROM budget_item_legacy')
+
+    # As sequences dos ids pertencem às tabelas antigas: solta antes do DROP e passa para as novas
+    op.execute('ALTER SEQUENCE budget_id_seq OWNED BY NONE')
+    op.execute('ALTER SEQUENCE budget_item_id_seq OWNED BY NONE')
+    op.execute('DROP TABLE budget_item_legacy')
+    op.execute('DROP TABLE budget_legacy')
+    op.execute('ALTER SEQUENCE budget_id_seq OWNED BY budget.id')
+    op.execute('ALTER SEQUENCE budget_item_id_seq OWNED BY budget_item.id')
+
+    _create_constraints(partitioned)
+
+
+def upgrade():
+    bind = op.get_bind()
+
+    with op.batch_alter_table('budget_item', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('budget_date', sa.DateTime(), nullable=True))
+
+    op.execute('UPDATE budget SET date = CURRENT_TIMESTAMP WHERE date IS NULL')
+    op.execute('UPDATE budget_item SET budget_date = (SELECT budget.date FROM budget WHERE budget.id = budget_item.budget_id)')
+
+    if bind.dialect.name != 'postgresql':
+        # SQLite (dev): só a coluna; particionamento é exclusivo do Postgres
+        return
+
+    # Itens órfãos não teriam partição (budget_date nulo)
+    op.execute('DELETE FROM budget_item WHERE budget_date IS NULL')
+    op.execute('ALTER TABLE budget_item ALTER COLUMN budget_date SET NOT NULL')
+    op.execute('ALTER TABLE budget ALTER COLUMN date SET NOT NULL')
+
+    _swap_tables(bind, partitioned=True)
+
+
+def downgrade():
+    bind = op.get_bind()
+
+    if bind.dialect.name == 'postgresql':
+        # Partições desanexadas pelo maintain-partitions (schema archive) não voltam
+        _swap_tables(bind, partitioned=False)
+        op.execute('ALTER TABLE budget ALTER COLUMN date DROP NOT NULL')
+
+    with op.batch_alter_table('budget_item', schema=None) as batch_op:
+        batch_op.drop_column('budget_date')
@@ -0,0 +1,26 @@
+"""User config catalog version
+
+Revision ID: b7e4d91a0c2f
+Revises: 3f1a7c2d9b41
+Create Date: 2026-10-18 11:02:15.730114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e4d91a0c2f'
+down_revision = '3f1a7c2d9b41'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user_config', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('catalog_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('user_config', schema=None) as batch_op:
+        batch_op.drop_column('catalog_version')
@@ -0,0 +1,30 @@
+"""Budget version and updated_at
+
+Revision ID: d2a8f5c61e07
+Revises: b7e4d91a0c2f
+Create Date: 2026-10-18 14:20:41.118302
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2a8f5c61e07'
+down_revision = 'b7e4d91a0c2f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('budget', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+
+    op.execute('UPDATE budget SET updated_at = date')
+
+
+def downgrade():
+    with op.batch_alter_table('budget', schema=None) as batch_op:
+        batch_op.drop_column('updated_at')
+        batch_op.drop_column('version')
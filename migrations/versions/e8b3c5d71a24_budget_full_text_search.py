@@ -0,0 +1,81 @@
+"""Budget full-text search
+
+Revision ID: e8b3c5d71a24
+Revises: d2a8f5c61e07
+Create Date: 2026-10-18 16:05:12.402871
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8b3c5d71a24'
+down_revision = 'd2a8f5c61e07'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+
+    if bind.dialect.name == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS unaccent')
+        # unaccent() é STABLE; coluna gerada e índice exigem função IMMUTABLE (dicionário fixo)
+        op.execute("""
+            CREATE OR REPLACE FUNCTION cineorca_unaccent(text) RETURNS text
+            LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+            AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$
+        """)
+        op.execute("""
+            ALTER TABLE budget ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+                setweight(to_tsvector('portuguese', cineorca_unaccent(coalesce(title, ''))), 'A') ||
+                setweight(to_tsvector('portuguese', cineorca_unaccent(coalesce(client, ''))), 'A') ||
+                setweight(to_tsvector('portuguese', cineorca_unaccent(coalesce(description, ''))), 'B')
+            ) STORED
+        """)
+        op.execute('CREATE INDEX idx_budget_search ON budget USING gin (search_vector)')
+
+    elif bind.dialect.name == 'sqlite':
+        op.execute("""
+            CREATE VIRTUAL TABLE budget_fts USING fts5(
+                title, client, description,
+                content='budget', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2'
+            )
+        """)
+        op.execute("""
+            CREATE TRIGGER budget_fts_ai AFTER INSERT ON budget BEGIN
+                INSERT INTO budget_fts(rowid, title, client, description)
+                VALUES (new.id, new.title, new.client, new.description);
+            END
+        """)
+        op.execute("""
+            CREATE TRIGGER budget_fts_ad AFTER DELETE ON budget BEGIN
+                INSERT INTO budget_fts(budget_fts, rowid, title, client, description)
+                VALUES ('delete', old.id, old.title, old.client, old.description);
+            END
+        """)
+        op.execute("""
+            CREATE TRIGGER budget_fts_au AFTER UPDATE OF title, client, description ON budget BEGIN
+                INSERT INTO budget_fts(budget_fts, rowid, title, client, description)
+                VALUES ('delete', old.id, old.title, old.client, old.description);
+                INSERT INTO budget_fts(rowid, title, client, description)
+                VALUES (new.id, new.title, new.client, new.description);
+            END
+        """)
+        op.execute("INSERT INTO budget_fts(budget_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    bind = op.get_bind()
+
+    if bind.dialect.name == 'postgresql':
+        op.execute('DROP INDEX IF EXISTS idx_budget_search')
+        op.execute('ALTER TABLE budget DROP COLUMN IF EXISTS search_vector')
+        op.execute('DROP FUNCTION IF EXISTS cineorca_unaccent(text)')
+
+    elif bind.dialect.name == 'sqlite':
+        for trigger in ('budget_fts_ai', 'budget_fts_ad', 'budget_fts_au'):
+            op.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+        op.execute('DROP TABLE IF EXISTS budget_fts')
@@ -0,0 +1,64 @@
+"""Client name_key for autocomplete
+
+Revision ID: f4a7d2b9c3e5
+Revises: e8b3c5d71a24
+Create Date: 2026-10-18 17:31:08.554120
+
+"""
+import unicodedata
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f4a7d2b9c3e5'
+down_revision = 'e8b3c5d71a24'
+branch_labels = None
+depends_on = None
+
+BATCH = 1000
+
+
+def _normalize(value):
+    # Cópia congelada de app.utils.normalize_name
+    text = unicodedata.normalize('NFKD', value or '')
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return ' '.join(text.casefold().split())[:100]
+
+
+def upgrade():
+    with op.batch_alter_table('client', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('name_key', sa.String(length=100), nullable=True))
+
+    # Backfill em Python: a mesma normalização do app (unaccent do banco não é idêntico)
+    bind = op.get_bind()
+    client = sa.table('client', sa.column('id', sa.Integer), sa.column('name', sa.String),
+                      sa.column('name_key', sa.String))
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(client.c.id, client.c.name).where(client.c.id > last_id).order_by(client.c.id).limit(BATCH)
+        ).all()
+        if not rows:
+            break
+        bind.execute(
+            client.update().where(client.c.id == sa.bindparam('_id')).values(name_key=sa.bindparam('_key')),
+            [{'_id': row.id, '_key': _normalize(row.name)} for row in rows],
+        )
+        last_id = rows[-1].id
+
+    op.create_index('idx_client_user_name_key', 'client', ['user_id', 'name_key'], unique=False)
+
+    if bind.dialect.name == 'postgresql':
+        # LIKE 'joa%' e LIKE '% joa%' (palavra do meio do nome) pelo mesmo índice
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        op.execute('CREATE INDEX idx_client_name_key_trgm ON client USING gin (name_key gin_trgm_ops)')
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('DROP INDEX IF EXISTS idx_client_name_key_trgm')
+    op.drop_index('idx_client_user_name_key', table_name='client')
+    with op.batch_alter_table('client', schema=None) as batch_op:
+        batch_op.drop_column('name_key')
@@ -0,0 +1,14 @@
+import os
+import signal
+
+from app import create_app
+from app.jobs import job_queue
+
+# Processo 'worker' do Procfile: consome a fila Redis de jobs (export, importação, recálculo).
+# SIGTERM (deploy/restart) termina o job atual e sai; o que ficou na fila espera o próximo worker.
+env = os.getenv('FLASK_ENV', 'production')
+app = create_app(env)
+
+if __name__ == '__main__':
+    signal.signal(signal.SIGTERM, lambda *_: job_queue.stop())
+    job_queue.work()